@@ -0,0 +1,148 @@
+"""Mixed read/write benchmark comparing database profiles
+
+Each profile gets a fresh SQLite file seeded with buyers and active offers.
+Worker threads then run a mix of catalog, offer and balance reads together
+with wallet purchases and offer joins for a fixed duration. It reports
+throughput, latency percentiles and server errors (e.g. 'database is
+locked' surfacing as 500s).
+
+    python benchmarks/db_profile_mixed.py --profiles default production --threads 16 --duration 10
+
+Exits non-zero if any profile produced server errors.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.config import DATABASE_PROFILES, configure_database, apply_sqlite_pragmas
+from src.models.user import db, User
+from src.models.offer import Offer
+from src.routes.offer import offer_bp
+from src.routes.wallet import wallet_bp
+
+
+def build_app(db_path, profile):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    configure_database(app, profile)
+    app.register_blueprint(offer_bp, url_prefix='/api')
+    app.register_blueprint(wallet_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config['DATABASE_PRAGMAS'])
+        db.create_all()
+    return app
+
+
+def seed(app, buyers, offers):
+    with app.app_context():
+        supplier = User(username='supplier', email='supplier@example.com', password_hash='x', user_type='seller')
+        db.session.add(supplier)
+        db.session.flush()
+        db.session.add_all([
+            User(username=f'buyer{i}', email=f'buyer{i}@example.com', password_hash='x', gpo_points=1000)
+            for i in range(buyers)
+        ])
+        db.session.add_all([
+            Offer(title=f'Offer {i}', product_service='goods', target_region='EU', base_price=10.0,
+                  deadline=datetime.utcnow() + timedelta(days=1), supplier_id=supplier.id, status='Active')
+            for i in range(offers)
+        ])
+        db.session.commit()
+        user_ids = [u.id for u in User.query.filter(User.id != supplier.id)]
+        offer_ids = [o.id for o in Offer.query]
+        return user_ids, offer_ids
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+
+
+def run_profile(profile, args):
+    app = build_app(os.path.join(tempfile.mkdtemp(), f'{profile}.db'), profile)
+    user_ids, offer_ids = seed(app, args.buyers, args.offers)
+    local = threading.local()
+    deadline = time.perf_counter() + args.duration
+
+    def operation(rng):
+        client = local.client
+        user_id, offer_id = rng.choice(user_ids), rng.choice(offer_ids)
+        if rng.random() >= args.write_ratio:
+            kind = 'read'
+            choice = rng.random()
+            if choice < 0.4:
+                response = client.get('/api/offers?limit=20')
+            elif choice < 0.7:
+                response = client.get(f'/api/offers/{offer_id}')
+            else:
+                response = client.get(f'/api/wallet/{user_id}/balance')
+        elif rng.random() < 0.5:
+            kind = 'write'
+            response = client.post('/api/wallet/purchase-points', json={
+                'user_id': user_id, 'amount': 5, 'payment_method': 'paypal'})
+        else:
+            kind = 'write'
+            response = client.post(f'/api/offers/join/{offer_id}', json={'user_id': user_id})
+        return kind, response.status_code
+
+    def worker(seed_value):
+        local.client = app.test_client()
+        rng = random.Random(seed_value)
+        latencies = {'read': [], 'write': []}
+        statuses = Counter()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            kind, status = operation(rng)
+            latencies[kind].append(time.perf_counter() - started)
+            statuses[status] += 1
+        return latencies, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(worker, range(args.threads)))
+    elapsed = time.perf_counter() - started
+
+    reads = [x for latencies, _ in results for x in latencies['read']]
+    writes = [x for latencies, _ in results for x in latencies['write']]
+    statuses = sum((s for _, s in results), Counter())
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    print(f'[{profile}] {len(reads) + len(writes)} ops in {elapsed:.1f}s: '
+          f'{len(reads) / elapsed:.0f} reads/s, {len(writes) / elapsed:.0f} writes/s, {errors} server errors')
+    print(f'[{profile}]   read  p50={percentile(reads, 50):.1f}ms p95={percentile(reads, 95):.1f}ms '
+          f'p99={percentile(reads, 99):.1f}ms')
+    print(f'[{profile}]   write p50={percentile(writes, 50):.1f}ms p95={percentile(writes, 95):.1f}ms '
+          f'p99={percentile(writes, 99):.1f}ms')
+    print(f'[{profile}]   responses: {dict(statuses)}')
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=['default', 'production'], choices=sorted(DATABASE_PROFILES))
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--buyers', type=int, default=2000)
+    parser.add_argument('--offers', type=int, default=200)
+    args = parser.parse_args()
+
+    errors = sum(run_profile(profile, args) for profile in args.profiles)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Concurrency stress test for POST /api/offers/join/<id>
+
+Starts many buyers joining one offer at the same moment, each buyer trying
+more than once, then checks that offers.current_participants equals the
+number of committed offer_participants rows and that nobody joined twice.
+
+    python benchmarks/join_offer_stress.py --buyers 500 --threads 64 --attempts 2
+
+Exits non-zero if the counter and the rows disagree.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db, User
+from src.models.offer import Offer, OfferParticipant
+from src.routes.offer import offer_bp
+
+
+def build_app(db_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(offer_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(app, buyers):
+    with app.app_context():
+        supplier = User(username='supplier', email='supplier@example.com', password_hash='x', user_type='seller')
+        db.session.add(supplier)
+        db.session.flush()
+        db.session.add_all([
+            User(username=f'buyer{i}', email=f'buyer{i}@example.com', password_hash='x')
+            for i in range(buyers)
+        ])
+        offer = Offer(
+            title='Flash group buy', product_service='goods', target_region='EU',
+            base_price=10.0, deadline=datetime.utcnow() + timedelta(days=1),
+            supplier_id=supplier.id, status='Active'
+        )
+        db.session.add(offer)
+        db.session.commit()
+        user_ids = [u.id for u in User.query.filter(User.id != supplier.id)]
+        return offer.id, user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--buyers', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--attempts', type=int, default=2, help='join requests per buyer')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'stress.db')
+    app = build_app(db_path)
+    offer_id, user_ids = seed(app, args.buyers)
+
+    requests = [uid for uid in user_ids for _ in range(args.attempts)]
+    local = threading.local()
+
+    def join(user_id):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        response = local.client.post(f'/api/offers/join/{offer_id}', json={'user_id': user_id})
+        return user_id, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(join, requests))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for _, status in results)
+    joined = Counter(user_id for user_id, status in results if status == 201)
+
+    with app.app_context():
+        counter = db.session.get(Offer, offer_id).current_participants
+        rows = OfferParticipant.query.filter_by(offer_id=offer_id, status='Committed').count()
+        distinct = db.session.query(db.func.count(db.distinct(OfferParticipant.user_id))).filter_by(
+            offer_id=offer_id, status='Committed'
+        ).scalar()
+
+    print(f'{len(requests)} join requests in {elapsed:.2f}s ({len(requests) / elapsed:.0f} req/s)')
+    print(f'responses: {dict(statuses)}')
+    print(f'current_participants={counter} committed_rows={rows} distinct_users={distinct}')
+
+    ok = (
+        counter == rows == distinct == len(joined)
+        and all(count == 1 for count in joined.values())
+        and statuses.get(500, 0) == 0
+    )
+    print('OK' if ok else 'MISMATCH')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
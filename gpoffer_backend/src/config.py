@@ -0,0 +1,96 @@
+import os
+
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+
+# Named database profiles, picked with DATABASE_PROFILE (default: 'default').
+# 'pragmas' are issued on every new SQLite connection; 'engine' is passed to
+# create_engine as SQLALCHEMY_ENGINE_OPTIONS.
+DATABASE_PROFILES = {
+    # SQLite and SQLAlchemy defaults: rollback journal, synchronous=FULL
+    'default': {
+        'pragmas': {},
+        'engine': {},
+    },
+    # WAL lets readers proceed while one writer commits; synchronous=NORMAL
+    # is durable across application crashes under WAL and only fsyncs at
+    # checkpoints.
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'cache_size': -65536,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+        },
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_recycle': 3600,
+            'pool_pre_ping': True,
+        },
+    },
+}
+
+# Environment overrides applied on top of the selected profile
+PRAGMA_ENV = {
+    'DB_JOURNAL_MODE': ('journal_mode', str),
+    'DB_SYNCHRONOUS': ('synchronous', str),
+    'DB_BUSY_TIMEOUT': ('busy_timeout', int),
+    'DB_CACHE_SIZE': ('cache_size', int),
+    'DB_MMAP_SIZE': ('mmap_size', int),
+}
+ENGINE_ENV = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+}
+ENGINE_SIZING = ('pool_size', 'max_overflow')
+
+
+def database_profile(name=None, environ=os.environ):
+    """Resolve (uri, pragmas, engine_options) for a profile plus env overrides"""
+    name = name or environ.get('DATABASE_PROFILE', 'default')
+    if name not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE '{name}', expected one of {sorted(DATABASE_PROFILES)}")
+    profile = DATABASE_PROFILES[name]
+    pragmas = dict(profile['pragmas'])
+    engine_options = dict(profile['engine'])
+    for overrides, target in ((PRAGMA_ENV, pragmas), (ENGINE_ENV, engine_options)):
+        for env_var, (key, cast) in overrides.items():
+            if environ.get(env_var):
+                target[key] = cast(environ[env_var])
+    return environ.get('DATABASE_URL', DEFAULT_DATABASE_URI), pragmas, engine_options
+
+
+def configure_database(app, profile=None):
+    """Put the profile's URI and engine options into app.config
+
+    Call before db.init_app(app), then apply_sqlite_pragmas() on the
+    created engines.
+    """
+    uri, pragmas, engine_options = database_profile(profile or app.config.get('DATABASE_PROFILE'))
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', uri)
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        pragmas = {}
+    elif ':memory:' in app.config['SQLALCHEMY_DATABASE_URI'] or app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://':
+        # In-memory databases use a single-connection pool without sizing
+        engine_options = {k: v for k, v in engine_options.items() if k not in ENGINE_SIZING}
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options)
+    app.config['DATABASE_PRAGMAS'] = pragmas
+
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Issue the PRAGMAs on every new DBAPI connection of engine"""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f'PRAGMA {key}={value}')
+        cursor.close()
@@ -0,0 +1,67 @@
+import logging
+import time
+from datetime import datetime
+
+from src.models.user import db
+from src.models.offer import Offer, OfferSweep
+from src.models.stats import adjust_counters
+from src.utils.offer_events import offer_events
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _settle_batch(cutoff, batch_size):
+    """Settle one batch of overdue active offers, returning (closed, expired)"""
+    offers = Offer.__table__
+    overdue = (
+        db.select(offers.c.id)
+        .where(offers.c.status == 'Active', offers.c.deadline <= cutoff)
+        .order_by(offers.c.deadline, offers.c.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    succeeded = offers.c.current_participants >= db.func.coalesce(offers.c.minimum_joiners, 0)
+    rows = db.session.execute(
+        offers.update()
+        .where(offers.c.id.in_(overdue), offers.c.status == 'Active')
+        .values(
+            status=db.case((succeeded, 'Closed'), else_='Expired'),
+            updated_at=datetime.utcnow()
+        )
+        .returning(offers.c.id, offers.c.status)
+    ).all()
+    # Bulk UPDATEs bypass the ORM counter tracking, so adjust them here
+    adjust_counters(db.session.connection(), active_offers=-len(rows))
+    db.session.commit()
+    for offer_id, status in rows:
+        offer_events.publish(offer_id, status=status)
+    closed = sum(1 for _, status in rows if status == 'Closed')
+    return closed, len(rows) - closed
+
+
+def sweep_expired_offers(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Move every Active offer past its deadline to Closed or Expired
+
+    Offers that reached minimum_joiners are Closed, the rest Expired. Each
+    batch is one set-based UPDATE in its own short transaction, walking the
+    (status, deadline) index. Returns the recorded OfferSweep.
+    """
+    cutoff = now or datetime.utcnow()
+    sweep = OfferSweep(started_at=datetime.utcnow(), cutoff=cutoff, batches=0, closed_count=0, expired_count=0)
+    started = time.perf_counter()
+    while True:
+        closed, expired = _settle_batch(cutoff, batch_size)
+        if closed or expired:
+            sweep.batches += 1
+            sweep.closed_count += closed
+            sweep.expired_count += expired
+        if closed + expired < batch_size:
+            break
+    sweep.duration_ms = (time.perf_counter() - started) * 1000
+    db.session.add(sweep)
+    db.session.commit()
+    logger.info('Offer sweep: %d closed, %d expired in %d batches (%.1f ms)',
+                sweep.closed_count, sweep.expired_count, sweep.batches, sweep.duration_ms)
+    return sweep
@@ -0,0 +1,140 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from src.models import db
+from src.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+# A claim older than this is assumed to belong to a dead dispatcher
+CLAIM_LEASE = timedelta(minutes=5)
+
+# event type -> handlers; '*' handlers receive every event
+OUTBOX_HANDLERS = {}
+
+
+def register_handler(event_type, handler=None):
+    """Register handler(event) for event_type, or use as @register_handler('offer.joined')
+
+    Handlers get the claimed row as a mapping (id, event_type, aggregate_type,
+    aggregate_id, payload, attempts) inside an app context. Raising marks
+    the delivery failed and schedules a retry.
+    """
+    if handler is None:
+        return lambda func: register_handler(event_type, func)
+    OUTBOX_HANDLERS.setdefault(event_type, []).append(handler)
+    return handler
+
+
+def handlers_for(event_type):
+    return OUTBOX_HANDLERS.get(event_type, []) + OUTBOX_HANDLERS.get('*', [])
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_events(worker, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Mark up to batch_size due events as processing by worker and return them
+
+    One UPDATE ... RETURNING, so concurrent dispatchers never claim the same
+    event. Claims whose lease expired are taken over. Events whose type has
+    no registered handler are left pending for a handler added later.
+    """
+    if not OUTBOX_HANDLERS:
+        return []
+    now = now or datetime.utcnow()
+    outbox = OutboxEvent.__table__
+    claimable = db.or_(
+        db.and_(outbox.c.status == 'pending', outbox.c.available_at <= now),
+        db.and_(outbox.c.status == 'processing', outbox.c.claimed_at < now - CLAIM_LEASE),
+    )
+    if '*' not in OUTBOX_HANDLERS:
+        claimable = db.and_(claimable, outbox.c.event_type.in_(list(OUTBOX_HANDLERS)))
+    due = db.select(outbox.c.id).where(claimable).order_by(outbox.c.id).limit(batch_size).scalar_subquery()
+    rows = db.session.execute(
+        outbox.update()
+        .where(outbox.c.id.in_(due), claimable)
+        .values(status='processing', claimed_at=now, claimed_by=worker, attempts=outbox.c.attempts + 1)
+        .returning(outbox.c.id, outbox.c.event_type, outbox.c.aggregate_type, outbox.c.aggregate_id,
+                   outbox.c.payload, outbox.c.attempts)
+    ).mappings().all()
+    db.session.commit()
+    return sorted(rows, key=lambda row: row['id'])
+
+
+def _settle(results):
+    """Record delivery outcomes: [(event row, error text or None)]"""
+    now = datetime.utcnow()
+    outbox = OutboxEvent.__table__
+    for row, error in results:
+        if error is None:
+            values = {'status': 'delivered', 'delivered_at': now, 'last_error': None}
+        elif row['attempts'] >= MAX_ATTEMPTS:
+            values = {'status': 'failed', 'last_error': error}
+        else:
+            values = {'status': 'pending', 'available_at': now + retry_delay(row['attempts']), 'last_error': error}
+        db.session.execute(outbox.update().where(outbox.c.id == row['id']).values(**values))
+    db.session.commit()
+
+
+class OutboxDispatcher(threading.Thread):
+    """Daemon thread that claims outbox events in batches and runs their handlers on a pool
+
+    Requests only insert outbox rows, so their latency does not depend on
+    how slow the handlers are. The dispatcher usually runs in the `run-jobs`
+    process rather than next to the requests, so it finds new events by
+    polling, which is one index probe on ix_outbox_events_status_available.
+    """
+
+    def __init__(self, app, workers=4, batch_size=DEFAULT_BATCH_SIZE, poll_interval=1.0):
+        super().__init__(name='outbox-dispatcher', daemon=True)
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox')
+        self._stop_event = threading.Event()
+
+    def _deliver(self, row):
+        with self.app.app_context():
+            try:
+                for handler in handlers_for(row['event_type']):
+                    handler(row)
+                return row, None
+            except Exception:
+                logger.exception('Outbox event %s (%s) failed', row['id'], row['event_type'])
+                return row, traceback.format_exc(limit=5)
+            finally:
+                db.session.remove()
+
+    def dispatch_once(self):
+        """Claim and deliver one batch; returns the number of events handled"""
+        with self.app.app_context():
+            rows = claim_events(self.worker, self.batch_size)
+            if rows:
+                _settle(list(self.pool.map(self._deliver, rows)))
+            return len(rows)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                handled = self.dispatch_once()
+            except Exception:
+                logger.exception('Outbox dispatch failed')
+                handled = 0
+            if handled < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,52 @@
+from src.models import db
+from src.models.user import User
+from src.models.offer import Offer
+from src.models.order import Order
+from src.jobs.outbox_dispatcher import register_handler
+from src.utils.mailer import send_email
+from src.utils.tokens import ADMIN_USER_TYPE
+
+# Delivery is at least once: a handler that fails after sending is retried
+# and may send again.
+
+
+@register_handler('offer.joined')
+def notify_supplier_of_join(event):
+    """Tell the supplier a buyer joined their offer"""
+    offer = db.session.execute(
+        db.select(Offer.title, User.email)
+        .join(User, User.id == Offer.supplier_id)
+        .where(Offer.id == event['aggregate_id'])
+    ).first()
+    if offer is None:
+        return
+    participants = event['payload']['current_participants']
+    send_email(offer.email, f'New participant on "{offer.title}"',
+               f'A buyer joined your offer "{offer.title}". It now has {participants} participants.')
+
+
+@register_handler('order.created')
+def email_buyer_order_confirmation(event):
+    """Confirm a new order to the buyer"""
+    order = db.session.get(Order, event['aggregate_id'])
+    if order is None:
+        return
+    recipient = order.buyer_email or db.session.scalar(db.select(User.email).where(User.id == order.buyer_id))
+    send_email(recipient, f'Order #{order.id} received',
+               f'Hello {order.buyer_name or ""},\n\n'
+               f'We received your order #{order.id}: {order.quantity} x {order.unit_price:.2f} = '
+               f'{order.total_amount:.2f}, paid by {order.payment_method}.\n'
+               f'Order status: {order.order_status}. Payment status: {order.payment_status}.')
+
+
+@register_handler('complaint.created')
+def alert_admins_of_complaint(event):
+    """Alert every active admin to a new complaint"""
+    payload = event['payload']
+    admins = db.session.scalars(
+        db.select(User.email).where(User.user_type == ADMIN_USER_TYPE, User.is_active.is_(True))
+    ).all()
+    send_email(admins, f"New complaint #{event['aggregate_id']}: {payload['subject']}",
+               f"Type: {payload['complaint_type']}\n"
+               f"Filed by user {payload['complainant_id']} against user {payload['against_user_id']}, "
+               f"order {payload['order_id']}.")
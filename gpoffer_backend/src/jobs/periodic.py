@@ -0,0 +1,30 @@
+import logging
+import threading
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(threading.Thread):
+    """Daemon thread that calls func inside an app context every interval seconds"""
+
+    def __init__(self, app, func, interval=60, name=None):
+        super().__init__(name=name or getattr(func, 'func', func).__name__, daemon=True)
+        self.app = app
+        self.func = func
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    self.func()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('%s failed', self.name)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,147 @@
+import logging
+import time
+from datetime import datetime
+
+from src.models import db
+from src.models.user import User
+from src.models.offer import Offer, OfferParticipant
+from src.models.order import WalletTransaction
+from src.models.stats import ReconciliationRun
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_DRIFT = 100
+
+
+def _participant_pass(since, participant_watermark):
+    """(offer id, stored current_participants, committed rows) for candidate offers"""
+    offers = Offer.__table__
+    participants = OfferParticipant.__table__
+    committed = (
+        db.select(participants.c.offer_id, db.func.count().label('actual'))
+        .where(participants.c.status == 'Committed')
+        .group_by(participants.c.offer_id)
+    )
+    candidates = None
+    if since is not None:
+        candidates = db.union(
+            db.select(offers.c.id).where(offers.c.updated_at >= since),
+            db.select(participants.c.offer_id).where(participants.c.id > participant_watermark),
+        ).subquery()
+        committed = committed.where(participants.c.offer_id.in_(db.select(candidates.c.id)))
+    committed = committed.subquery()
+    query = db.select(
+        offers.c.id, db.func.coalesce(offers.c.current_participants, 0), db.func.coalesce(committed.c.actual, 0)
+    ).outerjoin(committed, committed.c.offer_id == offers.c.id)
+    if candidates is not None:
+        query = query.where(offers.c.id.in_(db.select(candidates.c.id)))
+    return query
+
+
+def _balance_pass(since, transaction_watermark):
+    """(user id, stored gpo_points, ledger balance) for candidate users"""
+    users = User.__table__
+    ledger = WalletTransaction.__table__
+    signed = db.case((ledger.c.transaction_type == 'deduction', -ledger.c.amount), else_=ledger.c.amount)
+    balances = (
+        db.select(ledger.c.user_id, db.func.sum(signed).label('actual'))
+        .where(ledger.c.status == 'completed')
+        .group_by(ledger.c.user_id)
+    )
+    candidates = None
+    if since is not None:
+        candidates = db.union(
+            db.select(users.c.id).where(users.c.updated_at >= since),
+            db.select(ledger.c.user_id).where(ledger.c.id > transaction_watermark),
+        ).subquery()
+        balances = balances.where(ledger.c.user_id.in_(db.select(candidates.c.id)))
+    balances = balances.subquery()
+    query = db.select(
+        users.c.id, db.func.coalesce(users.c.gpo_points, 0), db.func.coalesce(balances.c.actual, 0)
+    ).outerjoin(balances, balances.c.user_id == users.c.id)
+    if candidates is not None:
+        query = query.where(users.c.id.in_(db.select(candidates.c.id)))
+    return query
+
+
+def _find_drift(query, batch_size):
+    """Stream a pass, returning (rows checked, [(id, stored, actual)] that differ)"""
+    checked, drifted = 0, []
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for row_id, stored, actual in result:
+        checked += 1
+        if stored != actual:
+            drifted.append((row_id, stored, int(actual)))
+    return checked, drifted
+
+
+def _repair(table, column, drifted, batch_size):
+    """Write the recomputed values in batched UPDATEs; returns rows repaired
+
+    Each row is only updated if it still holds the value that was checked,
+    so a join or ledger posting that lands meanwhile is not overwritten.
+    """
+    statement = (
+        table.update()
+        .where(table.c.id == db.bindparam('row_id'),
+               db.func.coalesce(table.c[column], 0) == db.bindparam('stored'))
+        .values({column: db.bindparam('actual'), 'updated_at': db.bindparam('now')})
+    )
+    repaired = 0
+    for start in range(0, len(drifted), batch_size):
+        now = datetime.utcnow()
+        params = [{'row_id': row_id, 'stored': stored, 'actual': actual, 'now': now}
+                  for row_id, stored, actual in drifted[start:start + batch_size]]
+        repaired += db.session.execute(statement, params).rowcount
+        db.session.commit()
+    return repaired
+
+
+def reconcile_denormalized(full=False, repair=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Check Offer.current_participants and User.gpo_points against their sources
+
+    current_participants is compared with the committed offer_participants
+    rows and gpo_points with the sum of completed wallet transactions, one
+    streaming GROUP BY pass each. Unless full is set, only rows touched since
+    the previous run's watermarks are checked. With repair, drifted rows are
+    set to the recomputed value. Returns the recorded ReconciliationRun.
+    """
+    previous = None if full else (
+        ReconciliationRun.query.order_by(ReconciliationRun.started_at.desc(), ReconciliationRun.id.desc()).first()
+    )
+    # Read the watermarks before the passes so rows written during them are
+    # picked up next time
+    run = ReconciliationRun(
+        started_at=datetime.utcnow(),
+        since=previous.started_at if previous else None,
+        participant_watermark=db.session.scalar(db.select(db.func.max(OfferParticipant.id))) or 0,
+        transaction_watermark=db.session.scalar(db.select(db.func.max(WalletTransaction.id))) or 0,
+        repair=repair, repaired=0, skipped=0,
+    )
+    started = time.perf_counter()
+
+    run.offers_checked, offer_drift = _find_drift(
+        _participant_pass(run.since, previous.participant_watermark if previous else 0), batch_size)
+    run.users_checked, user_drift = _find_drift(
+        _balance_pass(run.since, previous.transaction_watermark if previous else 0), batch_size)
+    run.offers_drifted, run.users_drifted = len(offer_drift), len(user_drift)
+    db.session.rollback()
+
+    run.drift = [
+        {'kind': kind, 'id': row_id, 'stored': stored, 'actual': actual}
+        for kind, rows in (('offer_participants', offer_drift), ('user_points', user_drift))
+        for row_id, stored, actual in rows
+    ][:MAX_REPORTED_DRIFT]
+    if repair:
+        run.repaired = (_repair(Offer.__table__, 'current_participants', offer_drift, batch_size)
+                        + _repair(User.__table__, 'gpo_points', user_drift, batch_size))
+        run.skipped = len(offer_drift) + len(user_drift) - run.repaired
+
+    run.duration_ms = (time.perf_counter() - started) * 1000
+    db.session.add(run)
+    db.session.commit()
+    if offer_drift or user_drift:
+        logger.warning('Reconciliation: %d offers and %d users drifted, %d repaired, %d skipped',
+                       run.offers_drifted, run.users_drifted, run.repaired, run.skipped)
+    return run
@@ -3,9 +3,14 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import time
+from datetime import datetime
+from functools import partial
+import click
+from flask import Flask
 from flask_cors import CORS
-from src.models.user import db
+from src.models import db
+from src.config import configure_database, apply_sqlite_pragmas
 from src.routes.user import user_bp
 from src.routes.offer import offer_bp
 from src.routes.auth import auth_bp
@@ -13,50 +18,237 @@ from src.routes.kyc import kyc_bp
 from src.routes.admin import admin_bp
 from src.routes.order import order_bp
 from src.routes.wallet import wallet_bp
+from src.utils.tokens import load_principal, ADMIN_USER_TYPE
+from src.utils.static_assets import AssetManifest
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# Import all models so they are registered on db.metadata
+from src.models.user import User
+from src.models.offer import Offer, OfferParticipant
+from src.models.order import Order, Complaint, PaymentDetails, WalletTransaction
+from src.models.stats import PlatformCounters
+from src.models.sales import SellerStatusRollup, SellerOfferRollup, SellerDailyRollup
+from src.models.outbox import OutboxEvent
+from src.models.kyc import KycDocument
+from src.models.schema import SCHEMA_VERSION, current_schema_version, upgrade_schema
 
-# Enable CORS for all routes
-CORS(app)
+from src.jobs.periodic import PeriodicJob
+from src.jobs.offer_sweeper import sweep_expired_offers
+from src.models.stats import reconcile_platform_counters
+from src.utils.ledger import backfill_balances
+from src.utils.offer_import import import_offers, read_records
+from src.models.sales import rebuild_sales_rollups
+from src.jobs.reconciler import reconcile_denormalized
+from src.jobs.outbox_dispatcher import OutboxDispatcher
+# Registers the outbox event handlers
+import src.jobs.outbox_handlers
 
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(offer_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(kyc_bp, url_prefix='/api')
-app.register_blueprint(admin_bp, url_prefix='/api')
-app.register_blueprint(order_bp, url_prefix='/api')
-app.register_blueprint(wallet_bp, url_prefix='/api')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+def create_app(config=None):
+    """Build the Flask app
 
-# Import all models to ensure they are registered
-from src.models.offer import Offer, OfferParticipant
-from src.models.order import Order, Complaint, PaymentDetails, WalletTransaction
+    Nothing here touches the database or starts threads: the schema is
+    created and migrated by `flask --app src.main upgrade-db` and background
+    jobs run under `flask --app src.main run-jobs`, so a preforking server
+    can load the app once and fork it without inherited connections or jobs.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Content-addressed KYC document storage and the per-file size limit
+    app.config['KYC_DOCUMENT_DIR'] = os.environ.get(
+        'KYC_DOCUMENT_DIR', os.path.join(os.path.dirname(__file__), 'database', 'kyc_documents'))
+    app.config['KYC_MAX_DOCUMENT_BYTES'] = int(os.environ.get('KYC_MAX_DOCUMENT_BYTES', 50 * 1024 * 1024))
+    # Outgoing email for outbox handlers; without MAIL_SERVER messages are only logged
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_SENDER'] = os.environ.get('MAIL_SENDER', 'no-reply@gpoffer.local')
+    app.config.update(config or {})
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    # Resolve Authorization: Bearer tokens into g.principal
+    app.before_request(load_principal)
+
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(offer_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(kyc_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(order_bp, url_prefix='/api')
+    app.register_blueprint(wallet_bp, url_prefix='/api')
+
+    # Database configuration: DATABASE_URL and DATABASE_PROFILE, see src/config.py
+    configure_database(app)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config['DATABASE_PRAGMAS'])
+
+    register_commands(app)
+    register_static(app)
+
+    return app
+
+
+def start_background_jobs(app):
+    """Start the periodic jobs and outbox dispatcher enabled in the environment
+
+    Each periodic job is enabled by setting its interval in seconds, and
+    outbox delivery by setting OUTBOX_DISPATCHER_WORKERS. Called by
+    `flask --app src.main run-jobs`, never by create_app, so web workers
+    do not each run (or fork) their own copy. Returns the started threads.
+    """
+    threads = []
+    for env_var, job in (('OFFER_SWEEP_INTERVAL', sweep_expired_offers),
+                         ('COUNTER_RECONCILE_INTERVAL', reconcile_platform_counters),
+                         ('DENORMALIZED_RECONCILE_INTERVAL', partial(
+                             reconcile_denormalized, repair=os.environ.get('DENORMALIZED_RECONCILE_REPAIR') == '1'))):
+        if int(os.environ.get(env_var, '0')) > 0:
+            threads.append(PeriodicJob(app, job, interval=int(os.environ[env_var])))
+    if int(os.environ.get('OUTBOX_DISPATCHER_WORKERS', '0')) > 0:
+        threads.append(OutboxDispatcher(app, workers=int(os.environ['OUTBOX_DISPATCHER_WORKERS'])))
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def register_commands(app):
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """Create the schema or apply pending migrations"""
+        applied = upgrade_schema()
+        for version, description in applied:
+            click.echo(f'Applied {version}: {description}')
+        click.echo(f'Schema at version {current_schema_version()} (latest {SCHEMA_VERSION})')
+
+    @app.cli.command('promote-admin')
+    @click.argument('username')
+    def promote_admin_command(username):
+        """Make an existing account a back-office admin"""
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.UsageError(f'No user named {username}')
+        user.user_type = ADMIN_USER_TYPE
+        user.updated_at = datetime.utcnow()
+        db.session.commit()
+        click.echo(f'{username} is now an admin')
+
+    @app.cli.command('run-jobs')
+    def run_jobs_command():
+        """Run the background jobs enabled in the environment until interrupted"""
+        threads = start_background_jobs(app)
+        if not threads:
+            raise click.UsageError('No jobs enabled: set OFFER_SWEEP_INTERVAL, COUNTER_RECONCILE_INTERVAL, '
+                                   'DENORMALIZED_RECONCILE_INTERVAL or OUTBOX_DISPATCHER_WORKERS')
+        click.echo(f"Running {', '.join(thread.name for thread in threads)}")
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            for thread in threads:
+                thread.stop()
+
+    @app.cli.command('sweep-offers')
+    @click.option('--loop', is_flag=True, help='Keep sweeping every --interval seconds.')
+    @click.option('--interval', default=60, show_default=True, help='Seconds between sweeps with --loop.')
+    @click.option('--batch-size', default=1000, show_default=True, help='Offers settled per UPDATE.')
+    def sweep_offers_command(loop, interval, batch_size):
+        """Close or expire Active offers whose deadline has passed"""
+        while True:
+            sweep = sweep_expired_offers(batch_size=batch_size)
+            click.echo(f'{sweep.closed_count} closed, {sweep.expired_count} expired '
+                       f'in {sweep.batches} batches ({sweep.duration_ms:.1f} ms)')
+            if not loop:
+                break
+            time.sleep(interval)
+
+    @app.cli.command('backfill-wallet-balances')
+    def backfill_wallet_balances_command():
+        """Fill balance_after on wallet transactions recorded before it existed"""
+        click.echo(f'{backfill_balances()} transactions updated')
+
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        """Recompute the admin dashboard counters from the users and offers tables"""
+        drift = reconcile_platform_counters()
+        click.echo(f'Counters reconciled, drift: {drift or "none"}')
+
+    @app.cli.command('reconcile-denormalized')
+    @click.option('--full', is_flag=True, help='Check every row instead of those changed since the last run.')
+    @click.option('--repair', is_flag=True, help='Overwrite drifted values with the recomputed ones.')
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows per fetch and per repair UPDATE.')
+    def reconcile_denormalized_command(full, repair, batch_size):
+        """Check offer participant counts and wallet balances against their source rows"""
+        run = reconcile_denormalized(full=full, repair=repair, batch_size=batch_size)
+        for drift in run.drift:
+            click.echo(f"{drift['kind']} {drift['id']}: stored {drift['stored']}, actual {drift['actual']}")
+        click.echo(f'{run.offers_checked} offers checked, {run.offers_drifted} drifted; '
+                   f'{run.users_checked} users checked, {run.users_drifted} drifted; '
+                   f'{run.repaired} repaired, {run.skipped} skipped ({run.duration_ms:.1f} ms)')
+
+    @app.cli.command('dispatch-outbox')
+    @click.option('--loop', is_flag=True, help='Keep dispatching as events arrive.')
+    @click.option('--workers', default=4, show_default=True, help='Handler threads.')
+    @click.option('--batch-size', default=100, show_default=True, help='Events claimed at a time.')
+    def dispatch_outbox_command(loop, workers, batch_size):
+        """Deliver pending outbox events to their handlers"""
+        dispatcher = OutboxDispatcher(app, workers=workers, batch_size=batch_size)
+        if loop:
+            dispatcher.run()
+            return
+        total = 0
+        while True:
+            handled = dispatcher.dispatch_once()
+            total += handled
+            if handled < batch_size:
+                break
+        click.echo(f'{total} events dispatched')
+
+    @app.cli.command('rebuild-sales-rollups')
+    def rebuild_sales_rollups_command():
+        """Recompute the seller dashboard rollups from the orders table"""
+        started = time.perf_counter()
+        rebuild_sales_rollups()
+        click.echo(f'Sales rollups rebuilt in {time.perf_counter() - started:.2f}s')
+
+    @app.cli.command('import-offers')
+    @click.argument('source', type=click.File('rb'))
+    @click.option('--format', 'fmt', type=click.Choice(['json', 'ndjson', 'csv']),
+                  help='Input format; defaults to the file extension.')
+    @click.option('--supplier-id', type=int, help='Supplier for rows that do not name one.')
+    @click.option('--batch-size', default=1000, show_default=True, help='Offers per transaction.')
+    def import_offers_command(source, fmt, supplier_id, batch_size):
+        """Bulk-import offers from a JSON array, NDJSON or CSV file"""
+        fmt = fmt or os.path.splitext(source.name)[1].lstrip('.').lower()
+        started = time.perf_counter()
+        result = import_offers(read_records(source, fmt), batch_size=batch_size,
+                               defaults={'supplier_id': supplier_id} if supplier_id else None)
+        elapsed = time.perf_counter() - started
+        for error in result['errors']:
+            click.echo(f"row {error['row']}: {error['message']}", err=True)
+        click.echo(f"Imported {result['imported']} offers, {result['failed']} failed "
+                   f"in {elapsed:.2f}s ({result['imported'] / max(elapsed, 1e-9):.0f} offers/s)")
+
+
+def register_static(app):
+    # SPA bundle is read into memory once; see src/utils/static_assets.py
+    static_assets = AssetManifest(app.static_folder)
 
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        asset = static_assets.lookup(path)
+        if asset is None:
             return "index.html not found", 404
+        return static_assets.respond(asset)
 
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
     app.run(host='0.0.0.0', port=5001, debug=True)
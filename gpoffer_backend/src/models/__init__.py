@@ -0,0 +1,4 @@
+from flask_sqlalchemy import SQLAlchemy
+
+# The one SQLAlchemy instance (and metadata) shared by every model module
+db = SQLAlchemy()
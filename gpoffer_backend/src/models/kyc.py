@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from src.models import db
+
+KYC_DOCUMENT_TYPES = ('passport', 'national_id', 'drivers_license', 'proof_of_address',
+                      'business_registration', 'tax_certificate', 'other')
+
+
+class KycDocument(db.Model):
+    """A KYC file attached to a user; the bytes live in the content-addressed DocumentStore"""
+    __tablename__ = 'kyc_documents'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    document_type = db.Column(db.String(30), nullable=False)
+    original_filename = db.Column(db.String(255))
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), default='submitted')  # submitted, accepted, rejected
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = db.relationship('User', backref='kyc_documents')
+    
+    # Re-uploading the same file as the same document type reuses the row
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'document_type', 'sha256', name='uq_kyc_documents_user_type_sha256'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'document_type': self.document_type,
+            'original_filename': self.original_filename,
+            'content_type': self.content_type,
+            'size': self.size,
+            'sha256': self.sha256,
+            'status': self.status,
+            'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None
+        }
@@ -1,8 +1,28 @@
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from src.models import db
+from sqlalchemy import event
+from sqlalchemy.orm import validates
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime, timezone
 import json
 
-db = SQLAlchemy()
+PAYMENT_METHODS = ('paypal', 'crypto', 'cash_on_delivery')
+
+# Columns that change through set-based UPDATEs (joins, status sweeps), so they
+# are kept out of the pre-rendered payload and spliced in at render time.
+VOLATILE_FIELDS = ('status', 'current_participants', 'updated_at')
+
+def _json_list(key, value):
+    """Coerce a JSON column value to a list, accepting legacy JSON strings"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError(f'{key} must be valid JSON')
+    if not isinstance(value, list):
+        raise ValueError(f'{key} must be a list')
+    return value
 
 class Offer(db.Model):
     __tablename__ = 'offers'
@@ -13,7 +33,7 @@ class Offer(db.Model):
     product_service = db.Column(db.String(100), nullable=False)
     target_region = db.Column(db.String(50), nullable=False)
     base_price = db.Column(db.Float, nullable=False)
-    discount_strategy = db.Column(db.Text)  # JSON string
+    discount_strategy = db.Column(db.JSON)  # [{"participants": 10, "price": 9.5}, ...]
     deadline = db.Column(db.DateTime, nullable=False)
     minimum_joiners = db.Column(db.Integer, default=0)
     terms_conditions = db.Column(db.Text)
@@ -21,17 +41,17 @@ class Offer(db.Model):
     visibility = db.Column(db.String(20), default='Public')  # Public or Invite Only
     gpo_points_required = db.Column(db.Integer, default=15)
     supplier_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    status = db.Column(db.String(20), default='Pending')  # Pending, Active, Cancelled, Expired
+    status = db.Column(db.String(20), default='Pending')  # Pending, Active, Cancelled, Closed, Expired
     current_participants = db.Column(db.Integer, default=0)
     
     # New fields for enhanced functionality
-    images = db.Column(db.Text)  # JSON array of image paths
+    images = db.Column(db.JSON)  # list of image paths
     category = db.Column(db.String(100))
-    tags = db.Column(db.Text)  # JSON array of tags
+    tags = db.Column(db.JSON)  # list of tags
     featured = db.Column(db.Boolean, default=False)
     
     # Payment method for this offer
-    payment_methods = db.Column(db.Text)  # JSON array: ["paypal", "crypto", "cash_on_delivery"]
+    payment_methods = db.Column(db.JSON)  # ["paypal", "crypto", "cash_on_delivery"]
     
     # Seller payment details for this specific offer
     paypal_client_id = db.Column(db.String(255))
@@ -39,13 +59,64 @@ class Offer(db.Model):
     crypto_type = db.Column(db.String(20))
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Pre-rendered JSON object of every non-volatile field, rebuilt on write
+    payload = db.Column(db.Text)
     
     # Relationships
     supplier = db.relationship('User', backref='offers')
     participants = db.relationship('OfferParticipant', backref='offer', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    # Composite indexes backing keyset pagination and catalog filters.
+    # Every catalog query is scoped to a status and ordered by (created_at, id)
+    # or (deadline, id), so each filter column sits between the two.
+    __table_args__ = (
+        db.Index('ix_offers_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_offers_status_deadline', 'status', 'deadline', 'id'),  # also drives the deadline sweep
+        db.Index('ix_offers_status_category_created', 'status', 'category', 'created_at', 'id'),
+        db.Index('ix_offers_status_region_created', 'status', 'target_region', 'created_at', 'id'),
+        db.Index('ix_offers_status_featured_created', 'status', 'featured', 'created_at', 'id'),
+        db.Index('ix_offers_status_price', 'status', 'base_price'),
+    )
+    
+    @validates('deadline')
+    def validate_deadline(self, key, value):
+        # Stored as naive UTC, so the payload matches what a reload returns
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    @validates('discount_strategy')
+    def validate_discount_strategy(self, key, value):
+        tiers = _json_list(key, value)
+        for tier in tiers:
+            if not isinstance(tier, dict):
+                raise ValueError('discount_strategy tiers must be objects')
+            participants = tier.get('participants', 0)
+            price = tier.get('price')
+            if not isinstance(participants, int) or isinstance(participants, bool) or participants < 0:
+                raise ValueError('discount_strategy participants must be a non-negative integer')
+            if not isinstance(price, (int, float)) or isinstance(price, bool) or price < 0:
+                raise ValueError('discount_strategy price must be a non-negative number')
+        return tiers
+    
+    @validates('images', 'tags')
+    def validate_string_list(self, key, value):
+        items = _json_list(key, value)
+        if not all(isinstance(item, str) for item in items):
+            raise ValueError(f'{key} must be a list of strings')
+        return items
+    
+    @validates('payment_methods')
+    def validate_payment_methods(self, key, value):
+        methods = _json_list(key, value)
+        for method in methods:
+            if method not in PAYMENT_METHODS:
+                raise ValueError(f'Unsupported payment method: {method}')
+        return methods
+    
+    def _static_dict(self):
         return {
             'id': self.id,
             'title': self.title,
@@ -53,7 +124,7 @@ class Offer(db.Model):
             'product_service': self.product_service,
             'target_region': self.target_region,
             'base_price': self.base_price,
-            'discount_strategy': json.loads(self.discount_strategy) if self.discount_strategy else [],
+            'discount_strategy': self.discount_strategy or [],
             'deadline': self.deadline.isoformat() if self.deadline else None,
             'minimum_joiners': self.minimum_joiners,
             'terms_conditions': self.terms_conditions,
@@ -61,19 +132,96 @@ class Offer(db.Model):
             'visibility': self.visibility,
             'gpo_points_required': self.gpo_points_required,
             'supplier_id': self.supplier_id,
-            'status': self.status,
-            'current_participants': self.current_participants,
-            'images': json.loads(self.images) if self.images else [],
+            'images': self.images or [],
             'category': self.category,
-            'tags': json.loads(self.tags) if self.tags else [],
+            'tags': self.tags or [],
             'featured': self.featured,
-            'payment_methods': json.loads(self.payment_methods) if self.payment_methods else [],
+            'payment_methods': self.payment_methods or [],
             'paypal_client_id': self.paypal_client_id,
             'crypto_wallet_address': self.crypto_wallet_address,
             'crypto_type': self.crypto_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def _volatile_dict(self):
+        return {
+            'status': self.status,
+            'current_participants': self.current_participants,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+    
+    def render_payload(self):
+        return json.dumps(self._static_dict(), separators=(',', ':'))
+    
+    def to_json(self):
+        """Serialize to a JSON string, reusing the stored payload when present"""
+        payload = self.payload or self.render_payload()
+        volatile = json.dumps(self._volatile_dict(), separators=(',', ':'))
+        return payload[:-1] + ',' + volatile[1:]
+    
+    def to_dict(self):
+        data = self._static_dict()
+        data.update(self._volatile_dict())
+        return data
+
+@event.listens_for(Offer, 'before_update')
+def _refresh_offer_payload(mapper, connection, target):
+    state = db.inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in mapper.columns.keys()
+           if name not in VOLATILE_FIELDS and name != 'payload'):
+        target.payload = target.render_payload()
+
+@event.listens_for(Offer, 'after_insert')
+def _store_offer_payload(mapper, connection, target):
+    # The primary key and column defaults only exist once the row is inserted
+    payload = target.render_payload()
+    connection.execute(
+        Offer.__table__.update().where(Offer.__table__.c.id == target.id).values(payload=payload)
+    )
+    set_committed_value(target, 'payload', payload)
+
+# Full-text index over the searchable offer columns. It is an external-content
+# FTS5 table, so it stores only the index and triggers keep it in step.
+OFFER_SEARCH_COLUMNS = ('title', 'description', 'product_service', 'category', 'tags')
+
+OFFER_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS offers_fts USING fts5(
+        title, description, product_service, category, tags,
+        content='offers', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS offers_fts_ai AFTER INSERT ON offers BEGIN
+        INSERT INTO offers_fts(rowid, title, description, product_service, category, tags)
+        VALUES (new.id, new.title, new.description, new.product_service, new.category, new.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS offers_fts_ad AFTER DELETE ON offers BEGIN
+        INSERT INTO offers_fts(offers_fts, rowid, title, description, product_service, category, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.product_service, old.category, old.tags);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS offers_fts_au
+    AFTER UPDATE OF title, description, product_service, category, tags ON offers BEGIN
+        INSERT INTO offers_fts(offers_fts, rowid, title, description, product_service, category, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.product_service, old.category, old.tags);
+        INSERT INTO offers_fts(rowid, title, description, product_service, category, tags)
+        VALUES (new.id, new.title, new.description, new.product_service, new.category, new.tags);
+    END""",
+)
+
+def create_offer_search_index(connection):
+    """Create the offers_fts index and triggers, indexing existing rows once"""
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'offers_fts'"
+    ).first()
+    for statement in OFFER_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql("INSERT INTO offers_fts(offers_fts) VALUES ('rebuild')")
+
+@event.listens_for(Offer.metadata, 'after_create')
+def _create_offer_search_index(metadata, connection, **kw):
+    create_offer_search_index(connection)
 
 class OfferParticipant(db.Model):
     __tablename__ = 'offer_participants'
@@ -88,6 +236,17 @@ class OfferParticipant(db.Model):
     # Relationships
     user = db.relationship('User', backref='offer_participations')
     
+    # A user holds at most one committed participation per offer; cancelled
+    # rows are kept as history and do not block re-joining
+    __table_args__ = (
+        db.Index('uq_offer_participants_committed', 'offer_id', 'user_id', unique=True,
+                 sqlite_where=db.text("status = 'Committed'"),
+                 postgresql_where=db.text("status = 'Committed'")),
+        # Roster keyset: (joined_at, id) within one offer and status. id makes
+        # each key unique, as two joins can share a timestamp.
+        db.Index('ix_offer_participants_roster', 'offer_id', 'status', 'joined_at', 'id', unique=True),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -98,3 +257,26 @@ class OfferParticipant(db.Model):
             'status': self.status
         }
 
+
+class OfferSweep(db.Model):
+    """One run of the deadline sweeper, kept to track its cost over time"""
+    __tablename__ = 'offer_sweeps'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    cutoff = db.Column(db.DateTime, nullable=False)
+    batches = db.Column(db.Integer, default=0)
+    closed_count = db.Column(db.Integer, default=0)  # minimum_joiners reached
+    expired_count = db.Column(db.Integer, default=0)  # minimum_joiners missed
+    duration_ms = db.Column(db.Float, default=0.0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'cutoff': self.cutoff.isoformat() if self.cutoff else None,
+            'batches': self.batches,
+            'closed_count': self.closed_count,
+            'expired_count': self.expired_count,
+            'duration_ms': self.duration_ms
+        }
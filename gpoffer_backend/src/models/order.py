@@ -1,8 +1,26 @@
-from flask_sqlalchemy import SQLAlchemy
+from src.models import db
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
+# Allowed status changes: current status -> statuses it may move to
+ORDER_STATUS_TRANSITIONS = {
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'shipped', 'cancelled'},
+    'shipped': {'delivered'},
+    'delivered': set(),
+    'cancelled': set(),
+}
+
+PAYMENT_STATUS_TRANSITIONS = {
+    'pending': {'paid', 'failed'},
+    'failed': {'pending', 'paid'},
+    'paid': {'refunded'},
+    'refunded': set(),
+}
+
+def allowed_predecessors(transitions, status):
+    """Statuses from which a move to status is allowed"""
+    return [current for current, targets in transitions.items() if status in targets]
 
 class Order(db.Model):
     __tablename__ = 'orders'
@@ -30,6 +48,13 @@ class Order(db.Model):
     buyer = db.relationship('User', foreign_keys=[buyer_id], backref='purchases')
     seller = db.relationship('User', foreign_keys=[seller_id], backref='sales')
     
+    # Covering indexes for the per-buyer/per-seller listings and their
+    # max(updated_at) + count conditional-GET versions
+    __table_args__ = (
+        db.Index('ix_orders_buyer_updated', 'buyer_id', 'updated_at'),
+        db.Index('ix_orders_seller_updated', 'seller_id', 'updated_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -132,11 +157,18 @@ class WalletTransaction(db.Model):
     payment_method = db.Column(db.String(50))  # paypal, crypto
     payment_reference = db.Column(db.String(255))  # transaction ID from payment provider
     status = db.Column(db.String(20), default='completed')  # pending, completed, failed
+    idempotency_key = db.Column(db.String(100))  # client-supplied, deduplicates retries
+    balance_after = db.Column(db.Integer)  # user's gpo_points right after this entry
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     user = db.relationship('User', backref='wallet_transactions')
     
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_wallet_transactions_idempotency'),
+        db.Index('ix_wallet_transactions_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -148,6 +180,8 @@ class WalletTransaction(db.Model):
             'payment_method': self.payment_method,
             'payment_reference': self.payment_reference,
             'status': self.status,
+            'idempotency_key': self.idempotency_key,
+            'balance_after': self.balance_after,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
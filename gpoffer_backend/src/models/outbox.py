@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from src.models import db
+
+
+class OutboxEvent(db.Model):
+    """A domain event written in the same transaction as the change it describes
+
+    Delivered to handlers afterwards by src/jobs/outbox_dispatcher.py.
+    """
+    __tablename__ = 'outbox_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)  # e.g. offer.joined
+    aggregate_type = db.Column(db.String(30), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, processing, delivered, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = db.Column(db.DateTime)
+    claimed_by = db.Column(db.String(100))
+    delivered_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # The dispatcher claims due events oldest first
+    __table_args__ = (
+        db.Index('ix_outbox_events_status_available', 'status', 'available_at', 'id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'aggregate_type': self.aggregate_type,
+            'aggregate_id': self.aggregate_id,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+def record_event(event_type, aggregate_type, aggregate_id, **payload):
+    """Add an outbox event to the current session; it commits with the caller's change"""
+    db.session.add(OutboxEvent(event_type=event_type, aggregate_type=aggregate_type,
+                               aggregate_id=aggregate_id, payload=payload))
@@ -0,0 +1,170 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.order import Order
+from src.models.stats import current_value, previous_value
+
+
+class SellerStatusRollup(db.Model):
+    """Per-seller order totals for each (order_status, payment_status) pair"""
+    __tablename__ = 'seller_status_rollups'
+    
+    seller_id = db.Column(db.Integer, primary_key=True)
+    order_status = db.Column(db.String(20), primary_key=True)
+    payment_status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'order_status': self.order_status,
+            'payment_status': self.payment_status,
+            'order_count': self.order_count,
+            'units': self.units,
+            'revenue': self.revenue
+        }
+
+class SellerOfferRollup(db.Model):
+    """Per-seller, per-offer totals of orders that are not cancelled"""
+    __tablename__ = 'seller_offer_rollups'
+    
+    seller_id = db.Column(db.Integer, primary_key=True)
+    offer_id = db.Column(db.Integer, primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'offer_id': self.offer_id,
+            'order_count': self.order_count,
+            'units': self.units,
+            'revenue': self.revenue
+        }
+
+class SellerDailyRollup(db.Model):
+    """Per-seller totals of orders that are not cancelled, by order day (UTC)"""
+    __tablename__ = 'seller_daily_rollups'
+    
+    seller_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'order_count': self.order_count,
+            'units': self.units,
+            'revenue': self.revenue
+        }
+
+ROLLUP_TABLES = (SellerStatusRollup.__table__, SellerOfferRollup.__table__, SellerDailyRollup.__table__)
+
+# Order columns the rollups are keyed or summed on
+ROLLUP_FIELDS = ('seller_id', 'offer_id', 'created_at', 'quantity', 'total_amount', 'order_status', 'payment_status')
+
+def _contributions(order):
+    """(table, key) pairs an order counts towards, with its measures"""
+    measures = (1, order['quantity'] or 0, order['total_amount'] or 0.0)
+    yield SellerStatusRollup.__table__, (
+        ('seller_id', order['seller_id']),
+        ('order_status', order['order_status']),
+        ('payment_status', order['payment_status']),
+    ), measures
+    if order['order_status'] != 'cancelled':
+        yield SellerOfferRollup.__table__, (
+            ('seller_id', order['seller_id']), ('offer_id', order['offer_id'])
+        ), measures
+        yield SellerDailyRollup.__table__, (
+            ('seller_id', order['seller_id']), ('day', order['created_at'].date())
+        ), measures
+
+def _upsert(connection, table, key, order_count, units, revenue):
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(table).values(
+        order_count=order_count, units=units, revenue=revenue, **dict(key)
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[name for name, _ in key],
+        set_={
+            'order_count': table.c.order_count + statement.excluded.order_count,
+            'units': table.c.units + statement.excluded.units,
+            'revenue': table.c.revenue + statement.excluded.revenue,
+        }
+    ))
+
+def record_order_changes(connection, changes):
+    """Fold (old, new) order snapshots into the rollups
+
+    Snapshots are dicts of ROLLUP_FIELDS; old is None for a new order and new
+    is None for a deleted one. Deltas are netted per rollup row first, so a
+    batch touches each row once.
+    """
+    deltas = {}
+    for old, new in changes:
+        for sign, order in ((-1, old), (1, new)):
+            if order is None:
+                continue
+            for table, key, (count, units, revenue) in _contributions(order):
+                total = deltas.setdefault((table, key), [0, 0, 0.0])
+                total[0] += sign * count
+                total[1] += sign * units
+                total[2] += sign * revenue
+    for (table, key), (count, units, revenue) in deltas.items():
+        if count or units or revenue:
+            _upsert(connection, table, key, count, units, revenue)
+
+@event.listens_for(Session, 'before_flush')
+def _track_order_rollups(session, flush_context, instances):
+    changes = []
+    for order in session.new:
+        if isinstance(order, Order):
+            if order.created_at is None:
+                order.created_at = datetime.utcnow()
+            changes.append((None, {f: current_value(order, f) for f in ROLLUP_FIELDS}))
+    for order in session.dirty:
+        if isinstance(order, Order):
+            state = db.inspect(order)
+            if any(state.attrs[f].history.has_changes() for f in ROLLUP_FIELDS):
+                old = {f: previous_value(order, f) for f in ROLLUP_FIELDS}
+                changes.append((old, {f: getattr(order, f) for f in ROLLUP_FIELDS}))
+    for order in session.deleted:
+        if isinstance(order, Order):
+            changes.append(({f: getattr(order, f) for f in ROLLUP_FIELDS}, None))
+    if changes:
+        record_order_changes(session.connection(), changes)
+
+def rebuild_sales_rollups():
+    """Recompute every rollup from the orders table with GROUP BY passes"""
+    orders = Order.__table__
+    measures = (
+        db.func.count().label('order_count'),
+        db.func.coalesce(db.func.sum(orders.c.quantity), 0).label('units'),
+        db.func.coalesce(db.func.sum(orders.c.total_amount), 0.0).label('revenue'),
+    )
+    not_cancelled = orders.c.order_status != 'cancelled'
+    if db.session.get_bind().dialect.name == 'sqlite':
+        day = db.func.date(orders.c.created_at)
+    else:
+        day = db.cast(orders.c.created_at, db.Date)
+    passes = (
+        (SellerStatusRollup.__table__,
+         (orders.c.seller_id, orders.c.order_status, orders.c.payment_status), ()),
+        (SellerOfferRollup.__table__, (orders.c.seller_id, orders.c.offer_id), (not_cancelled,)),
+        (SellerDailyRollup.__table__, (orders.c.seller_id, day.label('day')), (not_cancelled,)),
+    )
+    for table in ROLLUP_TABLES:
+        db.session.execute(table.delete())
+    for table, keys, where in passes:
+        select = db.select(*keys, *measures).where(*where).group_by(*keys)
+        db.session.execute(table.insert().from_select(
+            [key.name for key in keys] + ['order_count', 'units', 'revenue'], select
+        ))
+    db.session.commit()
@@ -0,0 +1,152 @@
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.schema import AddConstraint, CreateColumn
+
+from src.models import db
+from src.models.user import User
+from src.models.offer import Offer, OfferParticipant, OfferSweep, create_offer_search_index
+from src.models.order import Order, Complaint, PaymentDetails, WalletTransaction
+from src.models.stats import PlatformCounters, ReconciliationRun, reconcile_platform_counters
+from src.models.sales import SellerStatusRollup, SellerOfferRollup, SellerDailyRollup, rebuild_sales_rollups
+from src.models.outbox import OutboxEvent
+from src.models.kyc import KycDocument
+from src.utils.ledger import backfill_balances
+
+
+class SchemaVersion(db.Model):
+    """One row per schema migration applied to this database"""
+    __tablename__ = 'schema_versions'
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+def _create_tables(connection, *models):
+    for model in models:
+        model.__table__.create(connection, checkfirst=True)
+
+
+def _add_columns(connection, model, *names):
+    """ALTER TABLE ADD COLUMN for each named model column the table lacks"""
+    table = model.__table__
+    existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            ddl = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {ddl}')
+
+
+def _create_indexes(connection, model, *names):
+    indexes = {index.name: index for index in model.__table__.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def _add_unique_constraints(connection, model, *names):
+    """Add named UniqueConstraints to an existing table
+
+    SQLite cannot ALTER TABLE ADD CONSTRAINT, so there each one becomes a
+    unique index of the same name, which enforces the same rule.
+    """
+    table = model.__table__
+    inspector = inspect(connection)
+    existing = {c['name'] for c in inspector.get_unique_constraints(table.name)}
+    existing.update(index['name'] for index in inspector.get_indexes(table.name))
+    constraints = {c.name: c for c in table.constraints if isinstance(c, UniqueConstraint)}
+    for name in names:
+        if name in existing:
+            continue
+        constraint = constraints[name]
+        if connection.dialect.name == 'sqlite':
+            db.Index(name, *constraint.columns, unique=True).create(connection)
+        else:
+            connection.execute(AddConstraint(constraint))
+
+
+def _initial_schema(connection):
+    # Databases from before versioning may have any subset of these tables,
+    # so missing tables are created and older ones get what they lack
+    _create_tables(connection, User, Offer, OfferParticipant, OfferSweep, Order, Complaint,
+                   PaymentDetails, WalletTransaction, PlatformCounters,
+                   SellerStatusRollup, SellerOfferRollup, SellerDailyRollup)
+    # The committed app.db predates the profile and seller columns on users
+    _add_columns(connection, User, 'first_name', 'last_name', 'profile_image', 'location', 'bio',
+                 'store_name', 'store_description', 'admin_level', 'last_login')
+    _add_columns(connection, Offer, 'payload')
+    _add_columns(connection, WalletTransaction, 'idempotency_key', 'balance_after')
+    _create_indexes(connection, Offer, 'ix_offers_status_created', 'ix_offers_status_deadline',
+                    'ix_offers_status_category_created', 'ix_offers_status_region_created',
+                    'ix_offers_status_featured_created', 'ix_offers_status_price')
+    _create_indexes(connection, OfferParticipant, 'uq_offer_participants_committed')
+    _create_indexes(connection, OfferSweep, 'ix_offer_sweeps_started_at')
+    _create_indexes(connection, Order, 'ix_orders_buyer_updated', 'ix_orders_seller_updated')
+    _create_indexes(connection, WalletTransaction, 'ix_wallet_transactions_user_created')
+    _add_unique_constraints(connection, WalletTransaction, 'uq_wallet_transactions_idempotency')
+    create_offer_search_index(connection)
+
+
+def _add_reconciliation(connection):
+    _create_tables(connection, ReconciliationRun)
+    _create_indexes(connection, User, 'ix_users_updated_at')
+    _create_indexes(connection, Offer, 'ix_offers_updated_at')
+
+
+def _add_participant_roster_index(connection):
+    _create_indexes(connection, OfferParticipant, 'ix_offer_participants_roster')
+
+
+def _add_outbox(connection):
+    _create_tables(connection, OutboxEvent)
+
+
+def _add_kyc_documents(connection):
+    _create_tables(connection, KycDocument)
+
+
+def _backfill_derived_data(connection):
+    offers = Offer.__table__
+    missing = db.select(offers.c.id).where(offers.c.payload.is_(None))
+    for offer in db.session.scalars(db.select(Offer).where(Offer.id.in_(missing))).yield_per(500):
+        connection.execute(offers.update().where(offers.c.id == offer.id).values(payload=offer.render_payload()))
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("INSERT INTO offers_fts(offers_fts) VALUES ('rebuild')")
+    db.session.commit()
+    backfill_balances()
+    reconcile_platform_counters()
+    rebuild_sales_rollups()
+
+
+# Ordered (version, description, step). Append new steps; never edit applied ones.
+SCHEMA_MIGRATIONS = (
+    (1, 'Create tables, indexes and the offer search index', _initial_schema),
+    (2, 'Backfill offer payloads, wallet balances, counters and sales rollups', _backfill_derived_data),
+    (3, 'Add reconciliation runs and updated_at indexes', _add_reconciliation),
+    (4, 'Add the offer participant roster index', _add_participant_roster_index),
+    (5, 'Add the outbox_events table', _add_outbox),
+    (6, 'Add the kyc_documents table', _add_kyc_documents),
+)
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+def current_schema_version():
+    """Highest applied migration, 0 for a database that was never upgraded"""
+    if not inspect(db.engine).has_table(SchemaVersion.__tablename__):
+        return 0
+    return db.session.scalar(db.select(db.func.max(SchemaVersion.version))) or 0
+
+
+def upgrade_schema():
+    """Apply pending migrations in order; returns the (version, description) applied"""
+    SchemaVersion.__table__.create(db.engine, checkfirst=True)
+    current = current_schema_version()
+    applied = []
+    for version, description, step in SCHEMA_MIGRATIONS:
+        if version <= current:
+            continue
+        step(db.session.connection())
+        db.session.add(SchemaVersion(version=version, description=description))
+        db.session.commit()
+        applied.append((version, description))
+    return applied
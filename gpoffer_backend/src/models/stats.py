@@ -0,0 +1,184 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.user import User
+from src.models.offer import Offer
+
+
+class PlatformCounters(db.Model):
+    """Single-row running totals behind the admin dashboard
+
+    Maintained in the same transaction as the user and offer changes that
+    move them (see _track_counter_changes) and periodically reconciled
+    against the real tables.
+    """
+    __tablename__ = 'platform_counters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    active_users = db.Column(db.Integer, default=0, nullable=False)
+    pending_kyc = db.Column(db.Integer, default=0, nullable=False)
+    total_offers = db.Column(db.Integer, default=0, nullable=False)
+    active_offers = db.Column(db.Integer, default=0, nullable=False)
+    pending_offers = db.Column(db.Integer, default=0, nullable=False)
+    reconciled_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'total_users': self.total_users,
+            'active_users': self.active_users,
+            'total_offers': self.total_offers,
+            'active_offers': self.active_offers,
+            'pending_offers': self.pending_offers,
+            'pending_kyc': self.pending_kyc,
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
+
+class ReconciliationRun(db.Model):
+    """One pass of the denormalized-value reconciler (src/jobs/reconciler.py)
+
+    The watermarks bound the next incremental pass: rows updated since
+    started_at, plus participant and ledger rows with a higher id.
+    """
+    __tablename__ = 'reconciliation_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    since = db.Column(db.DateTime)  # None for a full pass
+    participant_watermark = db.Column(db.Integer, default=0, nullable=False)
+    transaction_watermark = db.Column(db.Integer, default=0, nullable=False)
+    repair = db.Column(db.Boolean, default=False, nullable=False)
+    offers_checked = db.Column(db.Integer, default=0)
+    offers_drifted = db.Column(db.Integer, default=0)
+    users_checked = db.Column(db.Integer, default=0)
+    users_drifted = db.Column(db.Integer, default=0)
+    repaired = db.Column(db.Integer, default=0)
+    skipped = db.Column(db.Integer, default=0)  # changed between check and repair
+    drift = db.Column(db.JSON)  # first MAX_REPORTED_DRIFT differences
+    duration_ms = db.Column(db.Float, default=0.0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'since': self.since.isoformat() if self.since else None,
+            'full': self.since is None,
+            'repair': self.repair,
+            'offers_checked': self.offers_checked,
+            'offers_drifted': self.offers_drifted,
+            'users_checked': self.users_checked,
+            'users_drifted': self.users_drifted,
+            'repaired': self.repaired,
+            'skipped': self.skipped,
+            'drift': self.drift or [],
+            'duration_ms': self.duration_ms
+        }
+
+COUNTERS_ROW_ID = 1
+
+# model -> (counter, (attribute, value) it counts, or None to count every row)
+TRACKED_COUNTERS = {
+    User: (
+        ('total_users', None),
+        ('active_users', ('is_active', True)),
+        ('pending_kyc', ('kyc_status', 'pending')),
+    ),
+    Offer: (
+        ('total_offers', None),
+        ('active_offers', ('status', 'Active')),
+        ('pending_offers', ('status', 'Pending')),
+    ),
+}
+
+def adjust_counters(connection, **deltas):
+    """Add deltas to the counters row using the given connection's transaction"""
+    counters = PlatformCounters.__table__
+    values = {name: counters.c[name] + delta for name, delta in deltas.items() if delta}
+    if values:
+        connection.execute(counters.update().where(counters.c.id == COUNTERS_ROW_ID).values(**values))
+
+def current_value(obj, attribute):
+    # Column defaults are only applied at INSERT, so a pending object may
+    # still hold None for them
+    value = getattr(obj, attribute)
+    if value is None:
+        default = obj.__table__.c[attribute].default
+        if default is not None and default.is_scalar:
+            value = default.arg
+    return value
+
+def previous_value(obj, attribute):
+    history = db.inspect(obj).attrs[attribute].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+@event.listens_for(Session, 'before_flush')
+def _track_counter_changes(session, flush_context, instances):
+    deltas = {}
+    for sign, objects in ((1, session.new), (-1, session.deleted)):
+        for obj in objects:
+            for counter, condition in TRACKED_COUNTERS.get(type(obj), ()):
+                if condition is None or current_value(obj, condition[0]) == condition[1]:
+                    deltas[counter] = deltas.get(counter, 0) + sign
+    for obj in session.dirty:
+        for counter, condition in TRACKED_COUNTERS.get(type(obj), ()):
+            if condition is None:
+                continue
+            attribute, expected = condition
+            if not db.inspect(obj).attrs[attribute].history.has_changes():
+                continue
+            delta = (getattr(obj, attribute) == expected) - (previous_value(obj, attribute) == expected)
+            if delta:
+                deltas[counter] = deltas.get(counter, 0) + delta
+    if any(deltas.values()):
+        # session.connection() joins the flush's transaction without autoflushing
+        adjust_counters(session.connection(), **deltas)
+
+def reconcile_platform_counters():
+    """Recompute every counter from the source tables in one statement
+
+    Returns {counter: drift} for counters that were off, which is empty when
+    incremental maintenance kept up.
+    """
+    counters = PlatformCounters.__table__
+    users = User.__table__
+    offers = Offer.__table__
+
+    def count(table, *where):
+        return db.select(db.func.count()).select_from(table).where(*where).scalar_subquery()
+
+    exact = {
+        'total_users': count(users),
+        'active_users': count(users, users.c.is_active.is_(True)),
+        'pending_kyc': count(users, users.c.kyc_status == 'pending'),
+        'total_offers': count(offers),
+        'active_offers': count(offers, offers.c.status == 'Active'),
+        'pending_offers': count(offers, offers.c.status == 'Pending'),
+    }
+    before = db.session.get(PlatformCounters, COUNTERS_ROW_ID)
+    before = before.to_dict() if before else {}
+    result = db.session.execute(
+        counters.update().where(counters.c.id == COUNTERS_ROW_ID)
+        .values(reconciled_at=datetime.utcnow(), **exact)
+    )
+    if result.rowcount == 0:
+        db.session.execute(counters.insert().from_select(
+            ['id', 'reconciled_at', *exact],
+            db.select(db.literal(COUNTERS_ROW_ID), db.literal(datetime.utcnow()), *exact.values())
+        ))
+    db.session.commit()
+    db.session.expire_all()
+    after = db.session.get(PlatformCounters, COUNTERS_ROW_ID).to_dict()
+    return {name: after[name] - before.get(name, 0) for name in exact if after[name] != before.get(name, 0)}
+
+def get_platform_counters():
+    """Read the counters row, building it on first use"""
+    counters = db.session.get(PlatformCounters, COUNTERS_ROW_ID)
+    if counters is None:
+        reconcile_platform_counters()
+        counters = db.session.get(PlatformCounters, COUNTERS_ROW_ID)
+    return counters
@@ -1,8 +1,6 @@
-from flask_sqlalchemy import SQLAlchemy
+from src.models import db
 from datetime import datetime
 
-db = SQLAlchemy()
-
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -35,7 +33,7 @@ class User(db.Model):
     admin_level = db.Column(db.String(20), default='basic')  # basic, super
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     last_login = db.Column(db.DateTime)
 
     def __repr__(self):
@@ -1,6 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from src.models.user import db, User
 from src.models.offer import Offer
+from src.models.order import Order, Complaint
+from src.models.stats import ReconciliationRun, get_platform_counters
+from src.models.outbox import OutboxEvent
+from src.utils.export import EXPORT_FORMATS, stream_export
+from src.utils.projection import parse_fields, fetch_projected
+from src.utils.pagination import parse_limit
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
@@ -9,11 +15,62 @@ admin_bp = Blueprint('admin', __name__)
 def get_all_users():
     """Admin: Get all users"""
     try:
-        users = User.query.all()
+        fields = parse_fields(User, request.args.get('fields'))
+        users = fetch_projected(User, fields, order_by=(User.id,))
         return jsonify({
             'success': True,
             'users': [user.to_dict() for user in users]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+# Exportable datasets: name -> (model, columns left out of the export)
+EXPORT_DATASETS = {
+    'users': (User, {'password_hash'}),
+    'offers': (Offer, {'payload'}),
+    'orders': (Order, set()),
+    'complaints': (Complaint, set()),
+}
+
+@admin_bp.route('/admin/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """Admin: Stream a dataset as CSV or NDJSON, resumable with ?after_id="""
+    try:
+        if dataset not in EXPORT_DATASETS:
+            return jsonify({
+                'success': False,
+                'message': f"Unknown dataset, expected one of: {', '.join(EXPORT_DATASETS)}"
+            }), 404
+        fmt = request.args.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        try:
+            after_id = int(request.args.get('after_id', 0))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'after_id must be an integer'
+            }), 400
+        
+        model, excluded = EXPORT_DATASETS[dataset]
+        table = model.__table__
+        columns = [column for column in table.c if column.key not in excluded]
+        return Response(
+            stream_with_context(stream_export(table, columns, fmt, after_id)),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={dataset}.{fmt}'}
+        )
     except Exception as e:
         return jsonify({
             'success': False,
@@ -70,23 +127,14 @@ def deactivate_user(user_id):
 def get_admin_stats():
     """Admin: Get platform statistics"""
     try:
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        total_offers = Offer.query.count()
-        active_offers = Offer.query.filter_by(status='Active').count()
-        pending_offers = Offer.query.filter_by(status='Pending').count()
-        pending_kyc = User.query.filter_by(kyc_status='pending').count()
+        counters = get_platform_counters()
+        stats = counters.to_dict()
+        stats.pop('reconciled_at')
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'total_offers': total_offers,
-                'active_offers': active_offers,
-                'pending_offers': pending_offers,
-                'pending_kyc': pending_kyc
-            }
+            'stats': stats,
+            'reconciled_at': counters.reconciled_at.isoformat() if counters.reconciled_at else None
         }), 200
         
     except Exception as e:
@@ -140,3 +188,37 @@ def update_admin_settings():
             'message': str(e)
         }), 500
 
+@admin_bp.route('/admin/reconciliations', methods=['GET'])
+def admin_get_reconciliations():
+    """Admin: Get recent participant-count and wallet-balance reconciliation runs"""
+    try:
+        limit = parse_limit(request.args.get('limit'), default=20)
+        runs = ReconciliationRun.query.order_by(ReconciliationRun.started_at.desc()).limit(limit).all()
+        return jsonify({
+            'success': True,
+            'reconciliations': [run.to_dict() for run in runs]
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@admin_bp.route('/admin/outbox', methods=['GET'])
+def admin_get_outbox():
+    """Admin: Get recent outbox events, e.g. ?status=failed"""
+    try:
+        limit = parse_limit(request.args.get('limit'), default=50)
+        query = OutboxEvent.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args['status'])
+        events = query.order_by(OutboxEvent.id.desc()).limit(limit).all()
+        return jsonify({
+            'success': True,
+            'events': [event.to_dict() for event in events]
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
@@ -1,10 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from werkzeug.security import generate_password_hash, check_password_hash
 from src.models.user import db, User
+from src.utils.tokens import issue_tokens, verify_refresh_token, authentication_required, InvalidToken
+from src.utils.conditional import conditional_get, row_version
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
+# Account types a caller may pick at sign-up; admin ('office') accounts are
+# only made by `flask --app src.main promote-admin`
+SELF_SERVICE_USER_TYPES = ('buyer', 'seller')
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -20,6 +26,13 @@ def register():
                     'message': f'Missing required field: {field}'
                 }), 400
         
+        user_type = data.get('user_type', 'buyer')
+        if user_type not in SELF_SERVICE_USER_TYPES:
+            return jsonify({
+                'success': False,
+                'message': f"user_type must be one of: {', '.join(SELF_SERVICE_USER_TYPES)}"
+            }), 400
+        
         # Check if user already exists
         existing_user = User.query.filter(
             (User.username == data['username']) | (User.email == data['email'])
@@ -37,7 +50,7 @@ def register():
             username=data['username'],
             email=data['email'],
             password_hash=password_hash,
-            user_type=data.get('user_type', 'buyer'),
+            user_type=user_type,
             company_name=data.get('company_name', ''),
             phone=data.get('phone', ''),
             address=data.get('address', '')
@@ -90,7 +103,8 @@ def login():
         return jsonify({
             'success': True,
             'message': 'Login successful',
-            'user': user.to_dict()
+            'user': user.to_dict(),
+            **issue_tokens(user)
         }), 200
         
     except Exception as e:
@@ -99,7 +113,54 @@ def login():
             'message': str(e)
         }), 500
 
+@auth_bp.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    """Exchange a refresh token for a new token pair"""
+    try:
+        data = request.get_json()
+        if not data or 'refresh_token' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Refresh token is required'
+            }), 400
+        
+        # Refresh is the one place a token costs a lookup, so deactivated
+        # accounts stop getting new access tokens
+        user = db.session.get(User, verify_refresh_token(data['refresh_token']))
+        if not user or not user.is_active:
+            return jsonify({
+                'success': False,
+                'message': 'Account is deactivated'
+            }), 401
+        
+        return jsonify({
+            'success': True,
+            **issue_tokens(user)
+        }), 200
+        
+    except InvalidToken as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 401
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@auth_bp.route('/me', methods=['GET'])
+def get_current_principal():
+    """Get the caller resolved from the access token"""
+    if g.principal is None:
+        return authentication_required()
+    return jsonify({
+        'success': True,
+        'principal': g.principal.to_dict()
+    }), 200
+
 @auth_bp.route('/profile/<int:user_id>', methods=['GET'])
+@conditional_get(lambda user_id: row_version(User, user_id))
 def get_profile(user_id):
     """Get user profile"""
     try:
@@ -1,5 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, g, request, jsonify, send_file
 from src.models.user import db, User
+from src.utils.projection import parse_fields, fetch_projected
+from src.utils.conditional import conditional_get, row_version
+from src.models.outbox import record_event
+from src.models.kyc import KycDocument, KYC_DOCUMENT_TYPES
+from src.utils.documents import DocumentStore, DocumentTooLarge, receive_documents
+from src.utils.ledger import UserNotFound
+from src.utils.tokens import authentication_required, is_owner_or_admin
 from datetime import datetime
 
 kyc_bp = Blueprint('kyc', __name__)
@@ -22,6 +29,7 @@ def verify_kyc():
         # Update KYC status to pending (in real app, this would trigger verification process)
         user.kyc_status = 'pending'
         user.updated_at = datetime.utcnow()
+        record_event('kyc.submitted', 'user', user.id, kyc_status=user.kyc_status)
         
         db.session.commit()
         
@@ -38,7 +46,175 @@ def verify_kyc():
             'message': str(e)
         }), 500
 
+# Declared part types accepted for KYC documents
+KYC_CONTENT_TYPES = ('application/pdf', 'image/jpeg', 'image/png', 'image/webp', 'image/heic')
+MAX_DOCUMENTS_PER_UPLOAD = 5
+
+def _document_store():
+    return DocumentStore(current_app.config['KYC_DOCUMENT_DIR'])
+
+def _discard_orphans(store, uploads):
+    """Delete files this upload stored first if no document row refers to them"""
+    for upload in uploads:
+        if not upload['deduplicated'] and KycDocument.query.filter_by(sha256=upload['sha256']).first() is None:
+            store.discard(upload['sha256'])
+
+def _document_access_denied(user_id):
+    """Error response unless the caller owns user_id's documents or is an admin"""
+    if g.principal is None:
+        return authentication_required()
+    if not is_owner_or_admin(user_id):
+        return jsonify({
+            'success': False,
+            'message': 'Not allowed to access these documents'
+        }), 403
+    return None
+
+@kyc_bp.route('/kyc/documents', methods=['POST'])
+def upload_kyc_documents():
+    """Upload KYC documents as multipart/form-data: user_id and document_type, then file parts
+
+    Only the user themselves or an admin may upload, checked before any file is stored.
+    """
+    if g.principal is None:
+        return authentication_required()
+    max_bytes = current_app.config['KYC_MAX_DOCUMENT_BYTES']
+    if request.content_length and request.content_length > max_bytes * MAX_DOCUMENTS_PER_UPLOAD + 64 * 1024:
+        return jsonify({
+            'success': False,
+            'message': f'Upload exceeds {MAX_DOCUMENTS_PER_UPLOAD} documents of {max_bytes} bytes'
+        }), 413
+    
+    accepted = []
+    
+    def check_file(fields, filename, content_type):
+        # Runs before a file's first byte is written, so bad requests cost nothing on disk
+        if not fields.get('user_id', '').isdigit():
+            raise ValueError('user_id must be sent before the file parts')
+        if not is_owner_or_admin(int(fields['user_id'])):
+            raise PermissionError('Not allowed to upload documents for this user')
+        if fields.get('document_type') not in KYC_DOCUMENT_TYPES:
+            raise ValueError(f"document_type must be one of: {', '.join(KYC_DOCUMENT_TYPES)}")
+        if not accepted and db.session.get(User, int(fields['user_id'])) is None:
+            raise UserNotFound('User not found')
+        if content_type not in KYC_CONTENT_TYPES:
+            raise ValueError(f"Unsupported file type {content_type}; expected {', '.join(KYC_CONTENT_TYPES)}")
+        if len(accepted) >= MAX_DOCUMENTS_PER_UPLOAD:
+            raise ValueError(f'At most {MAX_DOCUMENTS_PER_UPLOAD} documents per upload')
+        accepted.append(filename)
+    
+    store, uploads, committed = _document_store(), [], False
+    try:
+        fields, uploads = receive_documents(
+            request.stream, request.content_type, store, max_bytes, check_file, uploads
+        )
+        if not uploads:
+            raise ValueError('No document file was uploaded')
+        
+        user_id, document_type = int(fields['user_id']), fields['document_type']
+        documents, status = [], 200
+        for upload in uploads:
+            document = KycDocument.query.filter_by(
+                user_id=user_id, document_type=document_type, sha256=upload['sha256']
+            ).first()
+            if document is None:
+                document = KycDocument(
+                    user_id=user_id,
+                    document_type=document_type,
+                    original_filename=(upload['filename'] or '')[:255],
+                    content_type=upload['content_type'],
+                    size=upload['size'],
+                    sha256=upload['sha256']
+                )
+                db.session.add(document)
+                db.session.flush()
+                record_event('kyc.document_uploaded', 'user', user_id, document_id=document.id,
+                             document_type=document_type, sha256=document.sha256)
+                status = 201
+            documents.append(document)
+        db.session.commit()
+        committed = True
+        
+        return jsonify({
+            'success': True,
+            'message': 'Documents uploaded successfully',
+            'documents': [document.to_dict() for document in documents]
+        }), status
+        
+    except DocumentTooLarge as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 413
+    except PermissionError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 403
+    except UserNotFound as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    finally:
+        # Files stored before a failure would otherwise be left with no row
+        if not committed:
+            _discard_orphans(store, uploads)
+
+@kyc_bp.route('/kyc/documents/<int:user_id>', methods=['GET'])
+def get_kyc_documents(user_id):
+    """Get the KYC documents a user has uploaded (owner or admin only)"""
+    denied = _document_access_denied(user_id)
+    if denied:
+        return denied
+    try:
+        documents = KycDocument.query.filter_by(user_id=user_id).order_by(KycDocument.uploaded_at.desc()).all()
+        return jsonify({
+            'success': True,
+            'documents': [document.to_dict() for document in documents]
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@kyc_bp.route('/kyc/documents/<int:user_id>/<int:document_id>/file', methods=['GET'])
+def download_kyc_document(user_id, document_id):
+    """Download a KYC document's file for review (owner or admin only)"""
+    denied = _document_access_denied(user_id)
+    if denied:
+        return denied
+    document = KycDocument.query.filter_by(id=document_id, user_id=user_id).first()
+    if document is None:
+        return jsonify({
+            'success': False,
+            'message': 'Document not found'
+        }), 404
+    # Content-addressed files never change, so the digest is a strong ETag
+    return send_file(
+        _document_store().path_for(document.sha256),
+        mimetype=document.content_type,
+        download_name=document.original_filename or document.sha256,
+        etag=document.sha256,
+        conditional=True
+    )
+
 @kyc_bp.route('/kyc/status/<int:user_id>', methods=['GET'])
+@conditional_get(lambda user_id: row_version(User, user_id))
 def get_kyc_status(user_id):
     """Get KYC status for a user"""
     try:
@@ -62,6 +238,7 @@ def admin_approve_kyc(user_id):
         user.kyc_status = 'verified'
         user.kyc_verified_at = datetime.utcnow()
         user.updated_at = datetime.utcnow()
+        record_event('kyc.approved', 'user', user.id, kyc_status=user.kyc_status)
         
         db.session.commit()
         
@@ -85,6 +262,7 @@ def admin_reject_kyc(user_id):
         user = User.query.get_or_404(user_id)
         user.kyc_status = 'rejected'
         user.updated_at = datetime.utcnow()
+        record_event('kyc.rejected', 'user', user.id, kyc_status=user.kyc_status)
         
         db.session.commit()
         
@@ -105,11 +283,17 @@ def admin_reject_kyc(user_id):
 def admin_get_pending_kyc():
     """Admin: Get all users with pending KYC"""
     try:
-        users = User.query.filter_by(kyc_status='pending').all()
+        fields = parse_fields(User, request.args.get('fields'))
+        users = fetch_projected(User, fields, User.kyc_status == 'pending', order_by=(User.id,))
         return jsonify({
             'success': True,
             'users': [user.to_dict() for user in users]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,35 +1,325 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from src.models.user import db, User
-from src.models.offer import Offer, OfferParticipant
+from src.models.offer import Offer, OfferParticipant, OfferSweep
+from src.utils.pagination import parse_limit, parse_datetime, encode_cursor, decode_cursor
+from src.utils.responses import json_list_response
+from src.utils.projection import parse_fields, projected_select
+from src.utils.conditional import conditional_get, row_version
+from src.utils.search import build_match_query
+from src.utils.pricing import load_offer_pricing
+from src.utils.offer_import import build_offer, import_offers, read_records
+from src.utils.offer_events import offer_events, offer_state, load_offer_states
+from src.models.outbox import record_event
+from sqlalchemy import tuple_, Select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
 from datetime import datetime
 import json
 
 offer_bp = Blueprint('offer', __name__)
 
+# Columns already captured in Offer.payload; listings skip loading and decoding them
+PAYLOAD_DEFERRED = tuple(defer(column) for column in (
+    Offer.description, Offer.discount_strategy, Offer.terms_conditions,
+    Offer.images, Offer.tags, Offer.payment_methods
+))
+
+# Keyset orderings for the catalog: name -> (sort column, descending)
+OFFER_SORTS = {
+    'newest': (Offer.created_at, True),
+    'deadline': (Offer.deadline, False),
+}
+
+# Related data ?include= can embed in offers, each loaded in one query per page
+OFFER_INCLUDES = ('supplier', 'participant_count')
+
+def _parse_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def apply_offer_filters(query, args):
+    """Apply the catalog filters from the query string"""
+    if args.get('category'):
+        query = query.filter(Offer.category == args['category'])
+    if args.get('target_region'):
+        query = query.filter(Offer.target_region == args['target_region'])
+    if args.get('featured') not in (None, ''):
+        query = query.filter(Offer.featured == _parse_bool(args['featured']))
+    if args.get('min_price') not in (None, ''):
+        query = query.filter(Offer.base_price >= float(args['min_price']))
+    if args.get('max_price') not in (None, ''):
+        query = query.filter(Offer.base_price <= float(args['max_price']))
+    deadline_after = parse_datetime(args.get('deadline_after'), 'deadline_after')
+    if deadline_after:
+        query = query.filter(Offer.deadline >= deadline_after)
+    deadline_before = parse_datetime(args.get('deadline_before'), 'deadline_before')
+    if deadline_before:
+        query = query.filter(Offer.deadline <= deadline_before)
+    return query
+
+def parse_includes(value):
+    """Validate an ?include=a,b value against OFFER_INCLUDES"""
+    includes = tuple(dict.fromkeys(name.strip() for name in (value or '').split(',') if name.strip()))
+    unknown = [name for name in includes if name not in OFFER_INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(unknown)}; expected {', '.join(OFFER_INCLUDES)}")
+    return includes
+
+def load_offer_includes(offers, includes):
+    """Extra fields per offer id for ?include=, one query per include however many offers"""
+    extras = {offer.id: {} for offer in offers}
+    if not extras:
+        return extras
+    if 'supplier' in includes:
+        suppliers = {
+            row.id: {'id': row.id, 'store_name': row.store_name, 'rating': row.rating, 'kyc_status': row.kyc_status}
+            for row in db.session.execute(
+                db.select(User.id, User.store_name, User.rating, User.kyc_status)
+                .where(User.id.in_({offer.supplier_id for offer in offers}))
+            )
+        }
+        for offer in offers:
+            extras[offer.id]['supplier'] = suppliers.get(offer.supplier_id)
+    if 'participant_count' in includes:
+        counts = dict(db.session.execute(
+            db.select(OfferParticipant.offer_id, db.func.count())
+            .where(OfferParticipant.offer_id.in_(extras), OfferParticipant.status == 'Committed')
+            .group_by(OfferParticipant.offer_id)
+        ).all())
+        for offer_id, extra in extras.items():
+            extra['participant_count'] = counts.get(offer_id, 0)
+    return extras
+
+def _with_extra(payload, extra):
+    """Append extra keys to a pre-rendered JSON object"""
+    if not extra:
+        return payload
+    return payload[:-1] + ',' + json.dumps(extra, separators=(',', ':'))[1:]
+
+def paginate_offers(query, args):
+    """Order a query by the requested keyset and fetch one page after ?cursor="""
+    sort = args.get('sort', 'newest')
+    if sort not in OFFER_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(OFFER_SORTS)}")
+    column, descending = OFFER_SORTS[sort]
+    limit = parse_limit(args.get('limit'))
+    
+    key = tuple_(column, Offer.id)
+    if args.get('cursor'):
+        last_value, last_id = decode_cursor(args['cursor'], datetime, int)
+        query = query.filter(key < (last_value, last_id) if descending else key > (last_value, last_id))
+    if descending:
+        query = query.order_by(column.desc(), Offer.id.desc())
+    else:
+        query = query.order_by(column.asc(), Offer.id.asc())
+    
+    # Fetch one extra row to learn whether another page exists
+    query = query.limit(limit + 1)
+    offers = db.session.execute(query).all() if isinstance(query, Select) else query.all()
+    has_more = len(offers) > limit
+    offers = offers[:limit]
+    next_cursor = None
+    if has_more:
+        last = offers[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+    return offers, next_cursor
+
 @offer_bp.route('/offers', methods=['GET'])
 def get_offers():
-    """Get all active offers"""
+    """Get active offers, keyset-paginated and filtered"""
     try:
-        offers = Offer.query.filter_by(status='Active').all()
+        includes = parse_includes(request.args.get('include'))
+        if request.args.get('fields'):
+            # Column projection: only the requested fields are read and decoded
+            fields = parse_fields(Offer, request.args['fields'])
+            sort_key = OFFER_SORTS.get(request.args.get('sort', 'newest'), OFFER_SORTS['newest'])[0].key
+            query, dto = projected_select(Offer, fields, required=('id', sort_key, 'supplier_id'))
+            query = apply_offer_filters(query.where(Offer.status == 'Active'), request.args)
+            rows, next_cursor = paginate_offers(query, request.args)
+            rows = [dto(row) for row in rows]
+            extras = load_offer_includes(rows, includes) if includes else {}
+            return jsonify({
+                'success': True,
+                'offers': [dict(row.to_dict(), **extras.get(row.id, {})) for row in rows],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }), 200
+        
+        query = Offer.query.filter_by(status='Active').options(*PAYLOAD_DEFERRED)
+        query = apply_offer_filters(query, request.args)
+        offers, next_cursor = paginate_offers(query, request.args)
+        extras = load_offer_includes(offers, includes) if includes else {}
+        return json_list_response(
+            'offers',
+            [_with_extra(offer.to_json(), extras.get(offer.id)) for offer in offers],
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None
+        )
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'offers': [offer.to_dict() for offer in offers]
-        }), 200
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+# BM25 column weights, in OFFER_SEARCH_COLUMNS order: title, description,
+# product_service, category, tags
+SEARCH_WEIGHTS = (10.0, 1.0, 4.0, 2.0, 3.0)
+
+SEARCH_SQL = """
+    SELECT m.id, m.score
+    FROM (
+        SELECT rowid AS id, bm25(offers_fts, {weights}) AS score
+        FROM offers_fts
+        WHERE offers_fts MATCH :match
+    ) AS m
+    JOIN offers ON offers.id = m.id
+    WHERE offers.status = 'Active' {after}
+    ORDER BY m.score, m.id
+    LIMIT :limit
+"""
+
+@offer_bp.route('/offers/search', methods=['GET'])
+def search_offers():
+    """Full-text search over active offers, ranked by BM25"""
+    try:
+        includes = parse_includes(request.args.get('include'))
+        match = build_match_query(request.args.get('q'), _parse_bool(request.args.get('prefix', 'false')))
+        if not match:
+            return jsonify({
+                'success': False,
+                'message': 'Search query is required'
+            }), 400
+        limit = parse_limit(request.args.get('limit'))
+        params = {'match': match, 'limit': limit + 1}
+        after = ''
+        if request.args.get('cursor'):
+            params['score'], params['id'] = decode_cursor(request.args['cursor'], float, int)
+            after = 'AND (m.score, m.id) > (:score, :id)'
+        sql = SEARCH_SQL.format(weights=', '.join(map(str, SEARCH_WEIGHTS)), after=after)
+        rows = db.session.execute(db.text(sql), params).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].id) if has_more else None
+        
+        offers = Offer.query.filter(Offer.id.in_([row.id for row in rows])).options(*PAYLOAD_DEFERRED).all()
+        by_id = {offer.id: offer for offer in offers}
+        extras = load_offer_includes(offers, includes) if includes else {}
+        return json_list_response(
+            'offers',
+            [_with_extra(by_id[row.id].to_json(), extras.get(row.id)) for row in rows if row.id in by_id],
+            next_cursor=next_cursor,
+            has_more=has_more
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+def _offer_version(offer_id):
+    version = row_version(Offer, offer_id)
+    if version is None or 'supplier' not in request.args.get('include', ''):
+        return version
+    # An embedded supplier summary changes with the supplier row too
+    supplier_updated_at = db.session.scalar(
+        db.select(User.updated_at).join(Offer, Offer.supplier_id == User.id).where(Offer.id == offer_id)
+    )
+    if supplier_updated_at is None:
+        return version
+    return f'{version[0]}/{supplier_updated_at.isoformat()}', max(filter(None, (version[1], supplier_updated_at)))
+
 @offer_bp.route('/offers/<int:offer_id>', methods=['GET'])
+@conditional_get(_offer_version)
 def get_offer(offer_id):
     """Get specific offer details"""
     try:
+        includes = parse_includes(request.args.get('include'))
         offer = Offer.query.get_or_404(offer_id)
+        data = offer.to_dict()
+        if includes:
+            data.update(load_offer_includes([offer], includes)[offer.id])
         return jsonify({
             'success': True,
-            'offer': offer.to_dict()
+            'offer': data
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+# Upper bound on points per price-curve request
+MAX_CURVE_POINTS = 500
+
+def _parse_int_list(value, name):
+    if not value:
+        return []
+    try:
+        items = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ValueError(f'{name} must be a comma-separated list of integers')
+    if len(items) > MAX_CURVE_POINTS:
+        raise ValueError(f'{name} accepts at most {MAX_CURVE_POINTS} values')
+    if any(item < 0 for item in items):
+        raise ValueError(f'{name} must not be negative')
+    return items
+
+@offer_bp.route('/offers/<int:offer_id>/price-curve', methods=['GET'])
+def get_offer_price_curve(offer_id):
+    """Get unit prices and totals for many participant counts and quantities"""
+    try:
+        offer, schedule = load_offer_pricing(offer_id)
+        if offer is None:
+            return jsonify({
+                'success': False,
+                'message': 'Offer not found'
+            }), 404
+        
+        # Default to each breakpoint plus the current participant count
+        participants = _parse_int_list(request.args.get('participants'), 'participants')
+        if not participants:
+            participants = sorted(set(schedule.breakpoints) | {offer.current_participants or 0})
+        quantities = _parse_int_list(request.args.get('quantities'), 'quantities') or [1]
+        
+        curve = []
+        for count in participants:
+            unit_price = schedule.unit_price(count)
+            curve.append({
+                'participants': count,
+                'tier': schedule.tier_index(count),
+                'unit_price': unit_price,
+                'totals': [{'quantity': q, 'total_amount': unit_price * q} for q in quantities]
+            })
+        
+        return jsonify({
+            'success': True,
+            'offer_id': offer.id,
+            'base_price': schedule.base_price,
+            'current_participants': offer.current_participants,
+            'current_price': schedule.unit_price(offer.current_participants or 0),
+            'tiers': schedule.tiers(),
+            'curve': curve
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -42,33 +332,8 @@ def create_offer():
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['title', 'product_service', 'target_region', 'base_price', 'deadline', 'supplier_id']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'message': f'Missing required field: {field}'
-                }), 400
-        
-        # Parse deadline
-        deadline = datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
-        
-        # Create new offer
-        new_offer = Offer(
-            title=data['title'],
-            product_service=data['product_service'],
-            target_region=data['target_region'],
-            base_price=float(data['base_price']),
-            discount_strategy=json.dumps(data.get('discount_strategy', [])),
-            deadline=deadline,
-            minimum_joiners=data.get('minimum_joiners', 0),
-            terms_conditions=data.get('terms_conditions', ''),
-            pdf_file_path=data.get('pdf_file_path', ''),
-            visibility=data.get('visibility', 'Public'),
-            gpo_points_required=data.get('gpo_points_required', 15),
-            supplier_id=data['supplier_id']
-        )
+        # Validate required fields and build the offer
+        new_offer = build_offer(data)
         
         db.session.add(new_offer)
         db.session.commit()
@@ -79,6 +344,55 @@ def create_offer():
             'offer': new_offer.to_dict()
         }), 201
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+# Content types accepted by the bulk import, mapped to read_records formats
+IMPORT_CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'text/csv': 'csv',
+}
+
+@offer_bp.route('/offers/import', methods=['POST'])
+def import_offers_bulk():
+    """Bulk-create offers from a JSON array, NDJSON or CSV body"""
+    try:
+        fmt = request.args.get('format') or IMPORT_CONTENT_TYPES.get(request.mimetype)
+        if fmt not in IMPORT_CONTENT_TYPES.values():
+            return jsonify({
+                'success': False,
+                'message': 'Send application/json, application/x-ndjson or text/csv, or pass ?format='
+            }), 415
+        defaults = {}
+        if request.args.get('supplier_id'):
+            defaults['supplier_id'] = request.args['supplier_id']
+        batch_size = parse_limit(request.args.get('batch_size'), default=1000, maximum=5000)
+        
+        result = import_offers(read_records(request.stream, fmt), batch_size=batch_size, defaults=defaults)
+        
+        return jsonify({
+            'success': True,
+            'message': f"Imported {result['imported']} offers, {result['failed']} failed",
+            **result
+        }), 200
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -99,40 +413,52 @@ def join_offer(offer_id):
                 'message': 'User ID is required'
             }), 400
         
-        # Check if offer exists and is active
-        offer = Offer.query.get_or_404(offer_id)
-        if offer.status != 'Active':
-            return jsonify({
-                'success': False,
-                'message': 'Offer is not active'
-            }), 400
-        
-        # Check if user already joined
-        existing_participation = OfferParticipant.query.filter_by(
-            offer_id=offer_id,
-            user_id=user_id,
-            status='Committed'
+        # Increment the counter only if the offer is active. Doing the write
+        # first takes the write lock up front, and the increment happens in the
+        # database, so concurrent joins cannot lose updates.
+        offer = db.session.execute(
+            db.update(Offer)
+            .where(Offer.id == offer_id, Offer.status == 'Active')
+            .values(current_participants=Offer.current_participants + 1)
+            .returning(Offer.status, Offer.current_participants, Offer.base_price,
+                       db.cast(Offer.discount_strategy, db.Text).label('discount_strategy'), Offer.supplier_id)
+            .execution_options(synchronize_session=False)
         ).first()
         
-        if existing_participation:
+        if offer is None:
+            db.session.rollback()
+            if db.session.get(Offer, offer_id) is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Offer not found'
+                }), 404
             return jsonify({
                 'success': False,
-                'message': 'User already joined this offer'
+                'message': 'Offer is not active'
             }), 400
         
-        # Create participation record
+        # Create participation record; the partial unique index rejects a
+        # second committed participation and the rollback undoes the increment
         participation = OfferParticipant(
             offer_id=offer_id,
             user_id=user_id,
             commitment_amount=data.get('commitment_amount', offer.base_price)
         )
-        
         db.session.add(participation)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': 'User already joined this offer'
+            }), 400
         
-        # Update offer participant count
-        offer.current_participants += 1
-        
+        record_event('offer.joined', 'offer', offer_id, participation_id=participation.id, user_id=user_id,
+                     supplier_id=offer.supplier_id, current_participants=offer.current_participants)
         db.session.commit()
+        offer_events.publish(offer_id, **offer_state(
+            offer.status, offer.current_participants, offer.base_price, offer.discount_strategy))
         
         return jsonify({
             'success': True,
@@ -147,35 +473,114 @@ def join_offer(offer_id):
             'message': str(e)
         }), 500
 
+# Offers one event stream may watch
+MAX_STREAM_OFFERS = 100
+
+@offer_bp.route('/offers/events', methods=['GET'])
+def stream_offer_events():
+    """Server-Sent Events of participant count, discount tier and status for ?ids="""
+    try:
+        offer_ids = _parse_int_list(request.args.get('ids'), 'ids')
+        if not offer_ids:
+            raise ValueError('ids is required')
+        if len(offer_ids) > MAX_STREAM_OFFERS:
+            raise ValueError(f'At most {MAX_STREAM_OFFERS} offers per stream')
+        states = load_offer_states(offer_ids)
+        if not states:
+            return jsonify({
+                'success': False,
+                'message': 'Offer not found'
+            }), 404
+        # The stream starts with the current state, then only sends changes
+        subscription = offer_events.subscribe(states, current_app._get_current_object())
+        return Response(subscription.stream(offer_events), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+# User columns embedded in roster entries with ?include=user
+PARTICIPANT_USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'profile_image', 'location')
+
 @offer_bp.route('/offers/<int:offer_id>/participants', methods=['GET'])
 def get_offer_participants(offer_id):
-    """Get participants of an offer"""
+    """Get committed participants of an offer in join order, keyset-paginated"""
     try:
-        participants = OfferParticipant.query.filter_by(
-            offer_id=offer_id,
-            status='Committed'
-        ).all()
+        include_user = request.args.get('include') == 'user'
+        if request.args.get('include') not in (None, '', 'user'):
+            raise ValueError('include must be: user')
+        limit = parse_limit(request.args.get('limit'))
+        
+        # Walks ix_offer_participants_roster, so every page is one range seek
+        query = OfferParticipant.query.filter_by(offer_id=offer_id, status='Committed')
+        key = tuple_(OfferParticipant.joined_at, OfferParticipant.id)
+        if request.args.get('cursor'):
+            query = query.filter(key > decode_cursor(request.args['cursor'], datetime, int))
+        participants = query.order_by(OfferParticipant.joined_at, OfferParticipant.id).limit(limit + 1).all()
+        has_more = len(participants) > limit
+        participants = participants[:limit]
+        next_cursor = encode_cursor(participants[-1].joined_at, participants[-1].id) if has_more else None
+        
+        entries = [p.to_dict() for p in participants]
+        if include_user and participants:
+            columns = [getattr(User, name) for name in PARTICIPANT_USER_FIELDS]
+            users = {
+                row.id: dict(row._mapping)
+                for row in db.session.execute(
+                    db.select(*columns).where(User.id.in_({p.user_id for p in participants}))
+                )
+            }
+            for entry in entries:
+                entry['user'] = users.get(entry['user_id'])
         
         return jsonify({
             'success': True,
-            'participants': [p.to_dict() for p in participants]
+            'participants': entries,
+            'next_cursor': next_cursor,
+            'has_more': has_more
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
-@offer_bp.route('/admin/offers', methods=['GET'])
-def admin_get_all_offers():
-    """Admin: Get all offers regardless of status"""
+@offer_bp.route('/offers/<int:offer_id>/participants/count', methods=['GET'])
+def get_offer_participant_count(offer_id):
+    """Count committed participants of an offer without listing them"""
     try:
-        offers = Offer.query.all()
+        count = db.session.scalar(
+            db.select(db.func.count()).select_from(OfferParticipant)
+            .where(OfferParticipant.offer_id == offer_id, OfferParticipant.status == 'Committed')
+        )
         return jsonify({
             'success': True,
-            'offers': [offer.to_dict() for offer in offers]
+            'offer_id': offer_id,
+            'count': count
         }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@offer_bp.route('/admin/offers', methods=['GET'])
+def admin_get_all_offers():
+    """Admin: Get all offers regardless of status"""
+    try:
+        offers = Offer.query.options(*PAYLOAD_DEFERRED).all()
+        return json_list_response('offers', [offer.to_json() for offer in offers])
     except Exception as e:
         return jsonify({
             'success': False,
@@ -191,6 +596,7 @@ def admin_approve_offer(offer_id):
         offer.updated_at = datetime.utcnow()
         
         db.session.commit()
+        offer_events.publish(offer_id, status=offer.status)
         
         return jsonify({
             'success': True,
@@ -214,6 +620,7 @@ def admin_cancel_offer(offer_id):
         offer.updated_at = datetime.utcnow()
         
         db.session.commit()
+        offer_events.publish(offer_id, status=offer.status)
         
         return jsonify({
             'success': True,
@@ -228,3 +635,19 @@ def admin_cancel_offer(offer_id):
             'message': str(e)
         }), 500
 
+
+@offer_bp.route('/admin/offers/sweeps', methods=['GET'])
+def admin_get_offer_sweeps():
+    """Admin: Get recent deadline sweeps with rows touched and duration"""
+    try:
+        limit = parse_limit(request.args.get('limit'), default=20)
+        sweeps = OfferSweep.query.order_by(OfferSweep.started_at.desc()).limit(limit).all()
+        return jsonify({
+            'success': True,
+            'sweeps': [sweep.to_dict() for sweep in sweeps]
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db, User
-from src.models.offer import Offer
-from src.models.order import Order, Complaint
-from datetime import datetime
+from src.models.order import Order, Complaint, ORDER_STATUS_TRANSITIONS, PAYMENT_STATUS_TRANSITIONS, allowed_predecessors
+from src.models.sales import SellerStatusRollup, SellerOfferRollup, SellerDailyRollup, ROLLUP_FIELDS, record_order_changes
+from src.utils.pricing import load_offer_pricing
+from src.utils.pagination import parse_limit
+from src.utils.projection import parse_fields, fetch_projected
+from src.utils.conditional import conditional_get, row_version, collection_version
+from src.models.outbox import record_event
+from itertools import product
+from datetime import datetime, timedelta
 
 order_bp = Blueprint('order', __name__)
 
@@ -22,7 +28,12 @@ def create_order():
                 }), 400
         
         # Get offer details
-        offer = Offer.query.get_or_404(data['offer_id'])
+        offer, schedule = load_offer_pricing(data['offer_id'])
+        if offer is None:
+            return jsonify({
+                'success': False,
+                'message': 'Offer not found'
+            }), 404
         if offer.status != 'Active':
             return jsonify({
                 'success': False,
@@ -30,17 +41,7 @@ def create_order():
             }), 400
         
         # Calculate pricing based on current participants
-        discount_strategy = offer.discount_strategy
-        unit_price = offer.base_price
-        
-        if discount_strategy:
-            import json
-            strategy = json.loads(discount_strategy) if isinstance(discount_strategy, str) else discount_strategy
-            for tier in sorted(strategy, key=lambda x: x.get('participants', 0), reverse=True):
-                if offer.current_participants >= tier.get('participants', 0):
-                    unit_price = tier.get('price', offer.base_price)
-                    break
-        
+        unit_price = schedule.unit_price(offer.current_participants)
         total_amount = unit_price * data['quantity']
         
         # Create new order
@@ -60,6 +61,10 @@ def create_order():
         )
         
         db.session.add(new_order)
+        db.session.flush()
+        record_event('order.created', 'order', new_order.id, offer_id=new_order.offer_id,
+                     buyer_id=new_order.buyer_id, seller_id=new_order.seller_id,
+                     total_amount=new_order.total_amount, buyer_email=new_order.buyer_email)
         db.session.commit()
         
         return jsonify({
@@ -76,6 +81,7 @@ def create_order():
         }), 500
 
 @order_bp.route('/orders/<int:order_id>', methods=['GET'])
+@conditional_get(lambda order_id: row_version(Order, order_id))
 def get_order(order_id):
     """Get specific order details"""
     try:
@@ -91,14 +97,21 @@ def get_order(order_id):
         }), 500
 
 @order_bp.route('/orders/buyer/<int:buyer_id>', methods=['GET'])
+@conditional_get(lambda buyer_id: collection_version(Order, Order.updated_at, Order.buyer_id == buyer_id))
 def get_buyer_orders(buyer_id):
     """Get all orders for a buyer"""
     try:
-        orders = Order.query.filter_by(buyer_id=buyer_id).order_by(Order.created_at.desc()).all()
+        fields = parse_fields(Order, request.args.get('fields'))
+        orders = fetch_projected(Order, fields, Order.buyer_id == buyer_id, order_by=(Order.created_at.desc(),))
         return jsonify({
             'success': True,
             'orders': [order.to_dict() for order in orders]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -106,14 +119,64 @@ def get_buyer_orders(buyer_id):
         }), 500
 
 @order_bp.route('/orders/seller/<int:seller_id>', methods=['GET'])
+@conditional_get(lambda seller_id: collection_version(Order, Order.updated_at, Order.seller_id == seller_id))
 def get_seller_orders(seller_id):
     """Get all orders for a seller"""
     try:
-        orders = Order.query.filter_by(seller_id=seller_id).order_by(Order.created_at.desc()).all()
+        fields = parse_fields(Order, request.args.get('fields'))
+        orders = fetch_projected(Order, fields, Order.seller_id == seller_id, order_by=(Order.created_at.desc(),))
         return jsonify({
             'success': True,
             'orders': [order.to_dict() for order in orders]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@order_bp.route('/sellers/<int:seller_id>/dashboard', methods=['GET'])
+def get_seller_dashboard(seller_id):
+    """Get a seller's sales totals by status, by offer and by day from the rollups"""
+    try:
+        days = parse_limit(request.args.get('days'), default=30, maximum=366)
+        offers_limit = parse_limit(request.args.get('offers_limit'), default=20, maximum=200)
+        since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+        
+        by_status = SellerStatusRollup.query.filter_by(seller_id=seller_id).all()
+        by_offer = SellerOfferRollup.query.filter_by(seller_id=seller_id).order_by(
+            SellerOfferRollup.revenue.desc(), SellerOfferRollup.offer_id
+        ).limit(offers_limit).all()
+        by_day = SellerDailyRollup.query.filter(
+            SellerDailyRollup.seller_id == seller_id, SellerDailyRollup.day >= since
+        ).order_by(SellerDailyRollup.day).all()
+        
+        # Cancelled orders stay visible in by_status but count towards nothing else
+        live = [row for row in by_status if row.order_status != 'cancelled']
+        totals = {
+            'order_count': sum(row.order_count for row in live),
+            'units': sum(row.units for row in live),
+            'revenue': sum(row.revenue for row in live)
+        }
+        
+        return jsonify({
+            'success': True,
+            'seller_id': seller_id,
+            'totals': totals,
+            'by_status': [row.to_dict() for row in by_status if row.order_count],
+            'by_offer': [row.to_dict() for row in by_offer if row.order_count],
+            'by_day': [row.to_dict() for row in by_day if row.order_count]
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -148,6 +211,117 @@ def update_order_status(order_id):
             'message': str(e)
         }), 500
 
+# Upper bound on order ids per bulk status request
+MAX_BULK_ORDERS = 1000
+
+@order_bp.route('/orders/status/bulk', methods=['PUT'])
+def bulk_update_order_status():
+    """Seller: Apply one status transition to many orders"""
+    try:
+        data = request.get_json()
+        
+        seller_id = data.get('seller_id')
+        order_ids = data.get('order_ids')
+        if not seller_id or not isinstance(order_ids, list) or not order_ids:
+            return jsonify({
+                'success': False,
+                'message': 'seller_id and a non-empty order_ids list are required'
+            }), 400
+        if len(order_ids) > MAX_BULK_ORDERS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_ORDERS} orders per request'
+            }), 400
+        if not all(isinstance(order_id, int) and not isinstance(order_id, bool) for order_id in order_ids):
+            return jsonify({
+                'success': False,
+                'message': 'order_ids must be integers'
+            }), 400
+        
+        changes = {}
+        sources = {}
+        for field, transitions in (('order_status', ORDER_STATUS_TRANSITIONS),
+                                   ('payment_status', PAYMENT_STATUS_TRANSITIONS)):
+            if field not in data:
+                continue
+            if data[field] not in transitions:
+                return jsonify({
+                    'success': False,
+                    'message': f"Unknown {field}: {data[field]}"
+                }), 400
+            changes[field] = data[field]
+            # A field already at its target does not block the other one
+            sources[field] = allowed_predecessors(transitions, data[field]) + [data[field]]
+        if not changes:
+            return jsonify({
+                'success': False,
+                'message': 'order_status or payment_status is required'
+            }), 400
+        
+        # One UPDATE per combination of allowed starting statuses. Ownership
+        # and transition rules are in the WHERE clause, so an order either
+        # moves validly or is left untouched, and every returned row's old
+        # status is known for the sales rollups.
+        updated = set()
+        rollup_changes = []
+        fields = list(sources)
+        for previous in product(*(sources[field] for field in fields)):
+            previous = dict(zip(fields, previous))
+            if previous == changes:
+                continue
+            rows = db.session.execute(
+                db.update(Order)
+                .where(Order.id.in_(order_ids), Order.seller_id == seller_id,
+                       *(getattr(Order, field) == value for field, value in previous.items()))
+                .values(updated_at=datetime.utcnow(), **changes)
+                .returning(Order.id, *(getattr(Order, field) for field in ROLLUP_FIELDS))
+                .execution_options(synchronize_session=False)
+            ).all()
+            for row in rows:
+                updated.add(row.id)
+                new = {field: getattr(row, field) for field in ROLLUP_FIELDS}
+                rollup_changes.append(({**new, **previous}, new))
+        record_order_changes(db.session.connection(), rollup_changes)
+        db.session.commit()
+        
+        # Explain the rest with one lookup; other sellers' orders read as not found
+        failed = []
+        remaining = [order_id for order_id in dict.fromkeys(order_ids) if order_id not in updated]
+        if remaining:
+            current = {
+                row.id: row for row in db.session.execute(
+                    db.select(Order.id, Order.order_status, Order.payment_status)
+                    .where(Order.id.in_(remaining), Order.seller_id == seller_id)
+                )
+            }
+            for order_id in remaining:
+                row = current.get(order_id)
+                if row is None:
+                    failed.append({'id': order_id, 'error': 'not_found'})
+                elif all(getattr(row, field) == value for field, value in changes.items()):
+                    failed.append({'id': order_id, 'error': 'unchanged'})
+                else:
+                    failed.append({
+                        'id': order_id,
+                        'error': 'invalid_transition',
+                        'order_status': row.order_status,
+                        'payment_status': row.payment_status
+                    })
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(updated)} orders updated',
+            'updated': sorted(updated),
+            'failed': failed
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @order_bp.route('/complaints', methods=['POST'])
 def create_complaint():
     """Create a new complaint"""
@@ -174,6 +348,10 @@ def create_complaint():
         )
         
         db.session.add(new_complaint)
+        db.session.flush()
+        record_event('complaint.created', 'complaint', new_complaint.id, order_id=new_complaint.order_id,
+                     complainant_id=new_complaint.complainant_id, against_user_id=new_complaint.against_user_id,
+                     complaint_type=new_complaint.complaint_type, subject=new_complaint.subject)
         db.session.commit()
         
         return jsonify({
@@ -208,11 +386,17 @@ def get_complaint(complaint_id):
 def get_user_complaints(user_id):
     """Get all complaints filed by a user"""
     try:
-        complaints = Complaint.query.filter_by(complainant_id=user_id).order_by(Complaint.created_at.desc()).all()
+        fields = parse_fields(Complaint, request.args.get('fields'))
+        complaints = fetch_projected(Complaint, fields, Complaint.complainant_id == user_id, order_by=(Complaint.created_at.desc(),))
         return jsonify({
             'success': True,
             'complaints': [complaint.to_dict() for complaint in complaints]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -223,11 +407,17 @@ def get_user_complaints(user_id):
 def get_complaints_against_user(user_id):
     """Get all complaints filed against a user"""
     try:
-        complaints = Complaint.query.filter_by(against_user_id=user_id).order_by(Complaint.created_at.desc()).all()
+        fields = parse_fields(Complaint, request.args.get('fields'))
+        complaints = fetch_projected(Complaint, fields, Complaint.against_user_id == user_id, order_by=(Complaint.created_at.desc(),))
         return jsonify({
             'success': True,
             'complaints': [complaint.to_dict() for complaint in complaints]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -238,11 +428,17 @@ def get_complaints_against_user(user_id):
 def admin_get_all_complaints():
     """Admin: Get all complaints"""
     try:
-        complaints = Complaint.query.order_by(Complaint.created_at.desc()).all()
+        fields = parse_fields(Complaint, request.args.get('fields'))
+        complaints = fetch_projected(Complaint, fields, order_by=(Complaint.created_at.desc(),))
         return jsonify({
             'success': True,
             'complaints': [complaint.to_dict() for complaint in complaints]
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
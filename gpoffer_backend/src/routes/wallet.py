@@ -1,20 +1,38 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db, User
 from src.models.order import WalletTransaction, PaymentDetails
+from src.utils.ledger import post_transaction, balance_as_of, InsufficientPoints, UserNotFound, IdempotencyConflict
+from src.utils.pagination import parse_limit, parse_datetime, encode_cursor, decode_cursor
+from src.utils.projection import parse_fields, projected_select
+from src.utils.conditional import conditional_get, collection_version
+from sqlalchemy import tuple_
 from datetime import datetime
 
 wallet_bp = Blueprint('wallet', __name__)
 
 @wallet_bp.route('/wallet/<int:user_id>/balance', methods=['GET'])
 def get_wallet_balance(user_id):
-    """Get user's wallet balance"""
+    """Get user's wallet balance, optionally as of a past moment (?as_of=)"""
     try:
+        as_of = parse_datetime(request.args.get('as_of'), 'as_of')
+        if as_of:
+            return jsonify({
+                'success': True,
+                'balance': balance_as_of(user_id, as_of),
+                'as_of': as_of.isoformat(),
+                'user_id': user_id
+            }), 200
         user = User.query.get_or_404(user_id)
         return jsonify({
             'success': True,
             'balance': user.gpo_points,
             'user_id': user_id
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -22,20 +40,58 @@ def get_wallet_balance(user_id):
         }), 500
 
 @wallet_bp.route('/wallet/<int:user_id>/transactions', methods=['GET'])
+@conditional_get(lambda user_id: collection_version(
+    WalletTransaction, WalletTransaction.created_at, WalletTransaction.user_id == user_id))
 def get_wallet_transactions(user_id):
-    """Get user's wallet transaction history"""
+    """Get user's wallet transaction history, newest first, cursor-paginated"""
     try:
-        transactions = WalletTransaction.query.filter_by(user_id=user_id).order_by(WalletTransaction.created_at.desc()).all()
+        fields = parse_fields(WalletTransaction, request.args.get('fields'))
+        query, dto = projected_select(WalletTransaction, fields, required=('id', 'created_at'))
+        query = query.where(WalletTransaction.user_id == user_id)
+        created_after = parse_datetime(request.args.get('created_after'), 'created_after')
+        if created_after:
+            query = query.where(WalletTransaction.created_at >= created_after)
+        created_before = parse_datetime(request.args.get('created_before'), 'created_before')
+        if created_before:
+            query = query.where(WalletTransaction.created_at <= created_before)
+        if request.args.get('cursor'):
+            last_created, last_id = decode_cursor(request.args['cursor'], datetime, int)
+            query = query.where(tuple_(WalletTransaction.created_at, WalletTransaction.id) < (last_created, last_id))
+        
+        limit = parse_limit(request.args.get('limit'))
+        query = query.order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc()).limit(limit + 1)
+        transactions = [dto(row) for row in db.session.execute(query)]
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(transactions[-1].created_at, transactions[-1].id)
+        
         return jsonify({
             'success': True,
-            'transactions': [transaction.to_dict() for transaction in transactions]
+            'transactions': [transaction.to_dict() for transaction in transactions],
+            'next_cursor': next_cursor,
+            'has_more': has_more
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+def _parse_amount(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError('Amount must be a positive integer')
+    return value
+
+def _idempotency_key(data):
+    return request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
 @wallet_bp.route('/wallet/purchase-points', methods=['POST'])
 def purchase_points():
     """Purchase points for wallet"""
@@ -51,33 +107,42 @@ def purchase_points():
                     'message': f'Missing required field: {field}'
                 }), 400
         
-        user = User.query.get_or_404(data['user_id'])
-        
-        # Create transaction record
-        transaction = WalletTransaction(
-            user_id=data['user_id'],
+        amount = _parse_amount(data['amount'])
+        transaction, balance, replayed = post_transaction(
+            data['user_id'],
+            amount,
+            idempotency_key=_idempotency_key(data),
             transaction_type='purchase',
-            amount=data['amount'],
-            description=f"Purchased {data['amount']} points via {data['payment_method']}",
+            description=f"Purchased {amount} points via {data['payment_method']}",
             payment_method=data['payment_method'],
             payment_reference=data.get('payment_reference', ''),
             status='completed'  # In real app, this would be 'pending' until payment confirmed
         )
         
-        # Update user's points
-        user.gpo_points += data['amount']
-        user.updated_at = datetime.utcnow()
-        
-        db.session.add(transaction)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'message': 'Points purchased successfully',
-            'new_balance': user.gpo_points,
+            'new_balance': balance,
+            'replayed': replayed,
             'transaction': transaction.to_dict()
-        }), 201
+        }), 200 if replayed else 201
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except IdempotencyConflict as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    except UserNotFound as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -100,39 +165,41 @@ def deduct_points():
                     'message': f'Missing required field: {field}'
                 }), 400
         
-        user = User.query.get_or_404(data['user_id'])
-        
-        # Check if user has enough points
-        if user.gpo_points < data['amount']:
-            return jsonify({
-                'success': False,
-                'message': 'Insufficient points'
-            }), 400
-        
-        # Create transaction record
-        transaction = WalletTransaction(
-            user_id=data['user_id'],
+        amount = _parse_amount(data['amount'])
+        transaction, balance, replayed = post_transaction(
+            data['user_id'],
+            -amount,
+            idempotency_key=_idempotency_key(data),
             transaction_type='deduction',
-            amount=data['amount'],
             description=data['description'],
             reference_id=data['reference_id'],
             status='completed'
         )
         
-        # Update user's points
-        user.gpo_points -= data['amount']
-        user.updated_at = datetime.utcnow()
-        
-        db.session.add(transaction)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'message': 'Points deducted successfully',
-            'new_balance': user.gpo_points,
+            'new_balance': balance,
+            'replayed': replayed,
             'transaction': transaction.to_dict()
         }), 200
         
+    except (ValueError, InsufficientPoints) as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except IdempotencyConflict as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 409
+    except UserNotFound as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
     except Exception as e:
         db.session.rollback()
         return jsonify({
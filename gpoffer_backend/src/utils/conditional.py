@@ -0,0 +1,72 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from src.models.user import db
+
+
+def row_version(model, row_id):
+    """(version, last_modified) for one row from its updated_at, or None if missing"""
+    updated_at = db.session.execute(
+        db.select(model.updated_at).where(model.id == row_id)
+    ).first()
+    if updated_at is None:
+        return None
+    updated_at = updated_at[0]
+    return (updated_at.isoformat() if updated_at else ''), updated_at
+
+
+def collection_version(model, column, *criteria):
+    """(version, last_modified) for a set of rows from max(column) and count
+
+    Any insert, delete or update that bumps column changes one of the two.
+    """
+    latest, count = db.session.execute(
+        db.select(db.func.max(column), db.func.count()).select_from(model).where(*criteria)
+    ).one()
+    return f'{latest.isoformat() if latest else ""}/{count}', latest
+
+
+def _etag(version):
+    # The path and query string are part of the tag, so different
+    # projections, filters or pages never share one
+    return hashlib.sha1(f'{request.full_path}|{version}'.encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+
+def conditional_get(version_func):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view runs
+
+    version_func receives the view's URL arguments and returns
+    (version, last_modified), or None to let the view run (e.g. a 404).
+    Successful responses get strong ETag and Last-Modified headers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            version = version_func(**kwargs)
+            if version is None:
+                return view(**kwargs)
+            etag, last_modified = _etag(version[0]), version[1]
+            if _not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+            return response
+        return wrapper
+    return decorator
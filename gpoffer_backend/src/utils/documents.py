@@ -0,0 +1,128 @@
+import hashlib
+import os
+import tempfile
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+DOCUMENT_CHUNK_SIZE = 64 * 1024
+# Plain form fields (user_id, document_type) are tiny; anything larger is refused
+MAX_FIELD_BYTES = 1024
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+class DocumentStore:
+    """Files stored by SHA-256 under root/ab/cd/<digest>, so identical uploads share one file"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def writer(self, max_bytes):
+        return BlobWriter(self, max_bytes)
+
+    def discard(self, sha256):
+        try:
+            os.unlink(self.path_for(sha256))
+        except FileNotFoundError:
+            pass
+
+
+class BlobWriter:
+    """Temp file that hashes what is written and is moved to its content address on commit"""
+    __slots__ = ('store', 'max_bytes', 'file', 'path', 'hash', 'size')
+
+    def __init__(self, store, max_bytes):
+        incoming = os.path.join(store.root, 'incoming')
+        os.makedirs(incoming, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=incoming)
+        self.file = os.fdopen(fd, 'wb')
+        self.store = store
+        self.max_bytes = max_bytes
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise DocumentTooLarge(f'Documents are limited to {self.max_bytes} bytes')
+        self.hash.update(data)
+        self.file.write(data)
+
+    def commit(self):
+        """Publish the file; returns (sha256, size, deduplicated)"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        sha256 = self.hash.hexdigest()
+        target = self.store.path_for(sha256)
+        if os.path.exists(target):
+            os.unlink(self.path)
+            return sha256, self.size, True
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(self.path, target)
+        return sha256, self.size, False
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def receive_documents(stream, content_type, store, max_bytes, check_file, documents=None):
+    """Stream a multipart/form-data body into store without buffering files
+
+    The body is read DOCUMENT_CHUNK_SIZE bytes at a time. File parts are
+    hashed and written as they arrive. check_file(fields, filename,
+    content_type) runs before each file is written, with the form fields
+    sent ahead of it, and raises ValueError to refuse it.
+
+    Returns (fields, documents) where documents are dicts of filename,
+    content_type, sha256, size and deduplicated. Pass a list as documents
+    to see the files already stored if the upload fails part way.
+    """
+    mimetype, options = parse_options_header(content_type)
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        raise ValueError('Expected a multipart/form-data upload')
+    decoder = MultipartDecoder(options['boundary'].encode())
+    fields = {}
+    documents = [] if documents is None else documents
+    part = value = writer = None
+    try:
+        while True:
+            chunk = stream.read(DOCUMENT_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File):
+                    part = {'filename': event.filename,
+                            'content_type': event.headers.get('Content-Type', 'application/octet-stream')}
+                    check_file(fields, part['filename'], part['content_type'])
+                    writer = store.writer(max_bytes)
+                elif isinstance(event, Field):
+                    part, value = event.name, bytearray()
+                elif isinstance(event, Data) and writer is not None:
+                    writer.write(event.data)
+                    if not event.more_data:
+                        part['sha256'], part['size'], part['deduplicated'] = writer.commit()
+                        documents.append(part)
+                        writer = None
+                elif isinstance(event, Data):
+                    value += event.data
+                    if len(value) > MAX_FIELD_BYTES:
+                        raise ValueError(f'Form field {part} is too long')
+                    if not event.more_data:
+                        fields[part] = value.decode('utf-8', 'replace')
+                event = decoder.next_event()
+            if isinstance(event, Epilogue):
+                return fields, documents
+            if not chunk:
+                raise ValueError('Upload ended before the multipart body was complete')
+    finally:
+        if writer is not None:
+            writer.discard()
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from src.models.user import db
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def iter_batches(table, columns, after_id=0, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of rows ordered by id, one bounded keyset query per batch
+
+    Each batch runs on its own short-lived connection, so a long export holds
+    no read transaction open between batches and memory stays at one batch.
+    """
+    last_id = after_id
+    while True:
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                db.select(*columns)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return
+
+
+def stream_export(table, columns, fmt, after_id=0, batch_size=DEFAULT_BATCH_SIZE):
+    """Generate a CSV or NDJSON export of table, one chunk per batch
+
+    Resume an interrupted export by passing the id of the last row received
+    as after_id.
+    """
+    names = [column.key for column in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(names)
+    for rows in iter_batches(table, columns, after_id, batch_size):
+        for row in rows:
+            if writer:
+                writer.writerow([_csv_value(value) for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(names, row)), default=_json_default))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
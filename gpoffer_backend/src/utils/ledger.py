@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db, User
+from src.models.order import WalletTransaction
+
+
+class InsufficientPoints(Exception):
+    pass
+
+
+class UserNotFound(Exception):
+    pass
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key was already used for a different request"""
+    pass
+
+
+def find_by_idempotency_key(user_id, key):
+    if not key:
+        return None
+    return WalletTransaction.query.filter_by(user_id=user_id, idempotency_key=key).first()
+
+
+def post_transaction(user_id, delta, idempotency_key=None, **fields):
+    """Record a ledger entry and apply delta to the user's balance atomically
+
+    The balance changes through one conditional UPDATE, so a debit only
+    succeeds while gpo_points >= amount, even with concurrent requests.
+    Retrying with the same idempotency key returns the original transaction
+    and the balance it left, instead of applying it twice.
+
+    Returns (transaction, balance, replayed) and commits the session.
+    """
+    transaction = WalletTransaction(user_id=user_id, amount=abs(delta),
+                                    idempotency_key=idempotency_key or None, **fields)
+    db.session.add(transaction)
+    try:
+        # Claim the idempotency key before touching the balance
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        existing = find_by_idempotency_key(user_id, idempotency_key)
+        if existing is None:
+            raise
+        if existing.transaction_type != fields.get('transaction_type') or existing.amount != abs(delta):
+            raise IdempotencyConflict('Idempotency key was already used for a different transaction')
+        return existing, existing.balance_after, True
+
+    points = db.func.coalesce(User.gpo_points, 0)
+    condition = [User.id == user_id]
+    if delta < 0:
+        condition.append(points >= -delta)
+    balance = db.session.execute(
+        db.update(User)
+        .where(*condition)
+        .values(gpo_points=points + delta, updated_at=datetime.utcnow())
+        .returning(User.gpo_points)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if balance is None:
+        db.session.rollback()
+        if db.session.get(User, user_id) is None:
+            raise UserNotFound('User not found')
+        raise InsufficientPoints('Insufficient points')
+
+    # Stamped while the user row is locked, so ledger order by
+    # (created_at, id) matches the order the balance actually moved in
+    transaction.balance_after = balance
+    transaction.created_at = datetime.utcnow()
+    db.session.commit()
+    return transaction, balance, False
+
+
+def balance_as_of(user_id, moment):
+    """The user's balance at moment, read from the latest ledger entry before it
+
+    One descending seek on (user_id, created_at, id), so the cost is
+    logarithmic in the history size rather than a replay.
+    """
+    return db.session.execute(
+        db.select(WalletTransaction.balance_after)
+        .where(WalletTransaction.user_id == user_id,
+               WalletTransaction.created_at <= moment,
+               WalletTransaction.status == 'completed')
+        .order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc())
+        .limit(1)
+    ).scalar() or 0
+
+
+def backfill_balances():
+    """Fill balance_after for entries written before it existed
+
+    Recomputes running balances per user with one window-function pass.
+    Returns the number of rows updated.
+    """
+    signed = db.case(
+        (WalletTransaction.transaction_type == 'deduction', -WalletTransaction.amount),
+        else_=WalletTransaction.amount
+    )
+    running = (
+        db.select(
+            WalletTransaction.id.label('id'),
+            db.func.sum(signed).over(
+                partition_by=WalletTransaction.user_id,
+                order_by=(WalletTransaction.created_at, WalletTransaction.id)
+            ).label('balance')
+        )
+        .where(WalletTransaction.status == 'completed')
+        .subquery()
+    )
+    result = db.session.execute(
+        db.update(WalletTransaction)
+        .where(WalletTransaction.id == running.c.id, WalletTransaction.balance_after.is_(None))
+        .values(balance_after=running.c.balance)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
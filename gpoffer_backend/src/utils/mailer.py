@@ -0,0 +1,32 @@
+import logging
+import smtplib
+from email.message import EmailMessage
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+def send_email(recipients, subject, body):
+    """Send a plain-text email through MAIL_SERVER, or log it when none is configured
+
+    Raises on SMTP errors, so an outbox handler calling this is retried.
+    """
+    recipients = [recipients] if isinstance(recipients, str) else [r for r in recipients if r]
+    if not recipients:
+        return
+    config = current_app.config
+    if not config.get('MAIL_SERVER'):
+        logger.info('Email to %s: %s\n%s', ', '.join(recipients), subject, body)
+        return
+    message = EmailMessage()
+    message['From'] = config['MAIL_SENDER']
+    message['To'] = ', '.join(recipients)
+    message['Subject'] = subject
+    message.set_content(body)
+    with smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=30) as smtp:
+        if config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if config.get('MAIL_USERNAME'):
+            smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        smtp.send_message(message)
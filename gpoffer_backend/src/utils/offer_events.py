@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from src.models import db
+from src.models.offer import Offer
+from src.utils.pricing import compile_price_schedule
+
+logger = logging.getLogger(__name__)
+
+# Seconds between deliveries; a burst of joins within one interval becomes one event
+DEFAULT_INTERVAL = float(os.environ.get('OFFER_EVENTS_INTERVAL', '1.0'))
+# Undelivered events kept per subscriber; older ones are dropped for slow readers
+MAX_QUEUED_EVENTS = 1000
+PARTICIPATION_FIELDS = ('current_participants', 'tier', 'unit_price')
+# Offer ids per polling SELECT ... WHERE id IN (...)
+POLL_CHUNK_SIZE = 500
+
+
+def offer_state(status, current_participants, base_price, strategy_json):
+    """The live fields streamed for an offer, from its stored columns"""
+    schedule = compile_price_schedule(base_price, strategy_json)
+    participants = current_participants or 0
+    return {
+        'status': status,
+        'current_participants': participants,
+        'tier': schedule.tier_index(participants),
+        'unit_price': schedule.unit_price(participants),
+    }
+
+
+def load_offer_states(offer_ids):
+    """{offer_id: offer_state} for the offers that exist, read in one query"""
+    rows = db.session.execute(
+        db.select(Offer.id, Offer.status, Offer.current_participants, Offer.base_price,
+                  db.cast(Offer.discount_strategy, db.Text))
+        .where(Offer.id.in_(offer_ids))
+    )
+    return {row[0]: offer_state(*row[1:]) for row in rows}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """One stream's view: the offers it watches and what it last sent for each"""
+    __slots__ = ('offer_ids', 'last', 'queue', 'ready')
+
+    def __init__(self, offer_ids):
+        self.offer_ids = frozenset(offer_ids)
+        self.last = {}
+        self.queue = deque(maxlen=MAX_QUEUED_EVENTS)
+        self.ready = threading.Event()
+
+    def deliver(self, offer_id, state):
+        """Queue events for the fields that changed since the last delivery"""
+        last = self.last.get(offer_id, {})
+        events = []
+        if state['current_participants'] != last.get('current_participants'):
+            events.append(_sse('participants', {
+                'offer_id': offer_id,
+                'current_participants': state['current_participants'],
+                'unit_price': state['unit_price'],
+            }))
+        if state['tier'] != last.get('tier'):
+            events.append(_sse('tier', {'offer_id': offer_id, 'tier': state['tier'], 'unit_price': state['unit_price']}))
+        if state['status'] != last.get('status'):
+            events.append(_sse('status', {'offer_id': offer_id, 'status': state['status']}))
+        self.last[offer_id] = dict(state)
+        if events:
+            self.queue.extend(events)
+            self.ready.set()
+
+    def stream(self, hub, heartbeat=15.0):
+        """Yield SSE text until the client disconnects; idles on an Event, not a poll"""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                self.ready.wait(heartbeat)
+                self.ready.clear()
+                if not self.queue:
+                    yield ': keep-alive\n\n'
+                while self.queue:
+                    yield self.queue.popleft()
+        finally:
+            hub.unsubscribe(self)
+
+
+class OfferEventHub:
+    """Per-process pub/sub of live offer state with per-interval coalescing
+
+    Publishers in this process record the newest state of an offer, and a
+    single flusher thread delivers each changed offer at most once per
+    interval to the streams watching it. The same thread also re-reads the
+    watched offers from the database every interval. That picks up changes
+    committed by other processes, such as other web workers or the
+    `run-jobs` sweeper. Offers nobody watches are dropped at publish time
+    and never polled.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._subscribers = {}  # offer id -> set of Subscription
+        self._latest = {}  # offer id -> newest known state, for watched offers
+        self._dirty = set()
+        self._flusher = None
+        self._app = None
+
+    def subscribe(self, snapshot, app):
+        """Register a stream for {offer_id: state}, delivering the snapshot first
+
+        app is the Flask app whose database the flusher polls.
+        """
+        subscription = Subscription(snapshot)
+        with self._lock:
+            self._app = app
+            for offer_id, state in snapshot.items():
+                self._subscribers.setdefault(offer_id, set()).add(subscription)
+                self._merge(offer_id, state)
+                subscription.deliver(offer_id, self._latest[offer_id])
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='offer-events', daemon=True)
+                self._flusher.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for offer_id in subscription.offer_ids:
+                watchers = self._subscribers.get(offer_id)
+                if watchers is None:
+                    continue
+                watchers.discard(subscription)
+                if not watchers:
+                    del self._subscribers[offer_id]
+                    self._latest.pop(offer_id, None)
+                    self._dirty.discard(offer_id)
+
+    def publish(self, offer_id, **state):
+        """Record a committed change to an offer's live fields"""
+        if offer_id not in self._subscribers:
+            return
+        with self._lock:
+            if offer_id in self._subscribers and self._merge(offer_id, state):
+                self._dirty.add(offer_id)
+
+    def _merge(self, offer_id, state):
+        latest = self._latest.setdefault(offer_id, {})
+        before = dict(latest)
+        # Concurrent joins can commit in one order and publish in another, so
+        # the participant count (and the tier derived from it) only moves forward
+        if 'current_participants' in state and (
+                state['current_participants'] >= latest.get('current_participants', -1)):
+            latest.update((name, state[name]) for name in PARTICIPATION_FIELDS if name in state)
+        if 'status' in state:
+            latest['status'] = state['status']
+        return latest != before
+
+    def poll(self):
+        """Merge the stored state of every watched offer, marking changes dirty"""
+        with self._lock:
+            app, watched = self._app, list(self._subscribers)
+        if app is None or not watched:
+            return
+        with app.app_context():
+            states = {}
+            for start in range(0, len(watched), POLL_CHUNK_SIZE):
+                states.update(load_offer_states(watched[start:start + POLL_CHUNK_SIZE]))
+        with self._lock:
+            for offer_id, state in states.items():
+                if offer_id in self._subscribers and self._merge(offer_id, state):
+                    self._dirty.add(offer_id)
+
+    def flush(self):
+        """Deliver every offer changed since the last flush"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            for offer_id in dirty:
+                state = self._latest[offer_id]
+                for subscription in self._subscribers.get(offer_id, ()):
+                    subscription.deliver(offer_id, state)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Polling offer state failed')
+            self.flush()
+
+
+offer_events = OfferEventHub()
@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models.user import db
+from src.models.offer import Offer
+from src.models.stats import adjust_counters
+
+REQUIRED_OFFER_FIELDS = ('title', 'product_service', 'target_region', 'base_price', 'deadline', 'supplier_id')
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Columns the database or the import fills in, never taken from input
+_GENERATED_COLUMNS = ('id', 'payload')
+
+
+def _integer(data, field, default):
+    value = data.get(field)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be an integer')
+
+
+def _boolean(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def build_offer(data):
+    """Validate an offer submission and return an unsaved Offer
+
+    Raises ValueError naming the first missing or invalid field.
+    """
+    for field in REQUIRED_OFFER_FIELDS:
+        if data.get(field) in (None, ''):
+            raise ValueError(f'Missing required field: {field}')
+    try:
+        base_price = float(data['base_price'])
+    except (TypeError, ValueError):
+        raise ValueError('base_price must be a number')
+    try:
+        deadline = datetime.fromisoformat(str(data['deadline']).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError('deadline must be an ISO 8601 datetime')
+
+    return Offer(
+        title=data['title'],
+        description=data.get('description'),
+        product_service=data['product_service'],
+        target_region=data['target_region'],
+        base_price=base_price,
+        discount_strategy=data.get('discount_strategy', []),
+        deadline=deadline,
+        minimum_joiners=_integer(data, 'minimum_joiners', 0),
+        terms_conditions=data.get('terms_conditions', ''),
+        pdf_file_path=data.get('pdf_file_path', ''),
+        visibility=data.get('visibility') or 'Public',
+        gpo_points_required=_integer(data, 'gpo_points_required', 15),
+        supplier_id=_integer(data, 'supplier_id', None),
+        category=data.get('category'),
+        tags=data.get('tags', []),
+        images=data.get('images', []),
+        featured=_boolean(data.get('featured', False)),
+        payment_methods=data.get('payment_methods', [])
+    )
+
+
+def _offer_row(offer, now):
+    """Column values for a Core INSERT, with column defaults applied"""
+    offer.created_at = offer.updated_at = now
+    row = {}
+    for column in Offer.__table__.c:
+        if column.key in _GENERATED_COLUMNS:
+            continue
+        value = getattr(offer, column.key)
+        if value is None and column.default is not None and column.default.is_scalar:
+            value = column.default.arg
+            setattr(offer, column.key, value)
+        row[column.key] = value
+    return row
+
+
+def _insert_chunk(offers):
+    """Insert offers with multi-row INSERTs and store their payloads
+
+    The ORM after_insert hook does not run for Core inserts, so the payload
+    is rendered here once the ids are known.
+    """
+    table = Offer.__table__
+    now = datetime.utcnow()
+    rows = [_offer_row(offer, now) for offer in offers]
+    ids = db.session.execute(
+        table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    payloads = []
+    for offer, offer_id in zip(offers, ids):
+        offer.id = offer_id
+        payloads.append({'offer_id': offer_id, 'payload': offer.render_payload()})
+    db.session.execute(
+        table.update().where(table.c.id == db.bindparam('offer_id'))
+        .values(payload=db.bindparam('payload')),
+        payloads
+    )
+    statuses = [row['status'] for row in rows]
+    adjust_counters(
+        db.session.connection(),
+        total_offers=len(rows),
+        active_offers=statuses.count('Active'),
+        pending_offers=statuses.count('Pending')
+    )
+    return ids
+
+
+def _flush_chunk(chunk, result):
+    """Commit one chunk; on a database error retry row by row to isolate it"""
+    if not chunk:
+        return
+    try:
+        _insert_chunk([offer for _, offer in chunk])
+        db.session.commit()
+        result['imported'] += len(chunk)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+    for index, offer in chunk:
+        try:
+            _insert_chunk([offer])
+            db.session.commit()
+            result['imported'] += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            result['errors'].append({'row': index, 'message': str(e.orig if hasattr(e, 'orig') else e)})
+
+
+def import_offers(records, batch_size=DEFAULT_BATCH_SIZE, defaults=None):
+    """Validate and insert offer dicts in chunked transactions
+
+    records may be any iterable, so CSV and NDJSON input is consumed as it
+    streams in. Invalid rows are reported and skipped without aborting the
+    rest. Rows are numbered from 1.
+    """
+    result = {'imported': 0, 'errors': []}
+    chunk = []
+    for index, record in enumerate(records, start=1):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError('Each record must be an object')
+            if defaults:
+                record = {**defaults, **{k: v for k, v in record.items() if v not in (None, '')}}
+            chunk.append((index, build_offer(record)))
+        except ValueError as e:
+            result['errors'].append({'row': index, 'message': str(e)})
+        if len(chunk) >= batch_size:
+            _flush_chunk(chunk, result)
+            chunk = []
+    _flush_chunk(chunk, result)
+    result['failed'] = len(result['errors'])
+    return result
+
+
+def _decode_line(line):
+    # Returned rather than raised so one bad line only fails its own row
+    try:
+        return json.loads(line)
+    except ValueError:
+        return ValueError('Invalid JSON')
+
+
+def read_records(stream, fmt):
+    """Iterate offer dicts from a binary stream of JSON, NDJSON or CSV"""
+    if fmt == 'json':
+        records = json.load(stream)
+        if not isinstance(records, list):
+            raise ValueError('Expected a JSON array of offers')
+        return iter(records)
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        return csv.DictReader(text)
+    if fmt == 'ndjson':
+        return (_decode_line(line) for line in text if line.strip())
+    raise ValueError('format must be one of: json, ndjson, csv')
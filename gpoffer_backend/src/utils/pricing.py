@@ -0,0 +1,67 @@
+import json
+from bisect import bisect_right
+from functools import lru_cache
+
+from src.models.user import db
+from src.models.offer import Offer
+
+
+class PriceSchedule:
+    """Discount tiers compiled into sorted breakpoints for bisection lookups"""
+    __slots__ = ('base_price', 'breakpoints', 'prices')
+
+    def __init__(self, base_price, tiers):
+        self.base_price = base_price
+        # Keep the first tier listed for each threshold, as the old
+        # highest-threshold-first scan did
+        by_threshold = {}
+        for tier in tiers:
+            by_threshold.setdefault(tier.get('participants', 0), tier.get('price', base_price))
+        self.breakpoints = tuple(sorted(by_threshold))
+        self.prices = tuple(by_threshold[b] for b in self.breakpoints)
+
+    def tier_index(self, participants):
+        """Index of the tier in effect at participants, or -1 for base price"""
+        return bisect_right(self.breakpoints, participants) - 1
+
+    def unit_price(self, participants):
+        index = self.tier_index(participants)
+        return self.prices[index] if index >= 0 else self.base_price
+
+    def tiers(self):
+        return [{'participants': b, 'price': p} for b, p in zip(self.breakpoints, self.prices)]
+
+
+@lru_cache(maxsize=4096)
+def compile_price_schedule(base_price, strategy_json):
+    """Compile an offer's discount_strategy JSON text, cached by its content
+
+    The raw JSON text is part of the cache key, so editing an offer's tiers
+    or base price yields a new entry rather than a stale hit.
+    """
+    tiers = json.loads(strategy_json) if strategy_json else []
+    if isinstance(tiers, str):
+        # Rows written before discount_strategy became a JSON column
+        tiers = json.loads(tiers)
+    return PriceSchedule(base_price, tiers or [])
+
+
+def load_offer_pricing(offer_id):
+    """Fetch the columns pricing needs plus the compiled schedule
+
+    Returns (row, schedule), or (None, None) if the offer does not exist. The
+    strategy is read as raw text so cache hits skip JSON decoding entirely.
+    """
+    row = db.session.execute(
+        db.select(
+            Offer.id,
+            Offer.status,
+            Offer.supplier_id,
+            Offer.base_price,
+            Offer.current_participants,
+            db.cast(Offer.discount_strategy, db.Text).label('discount_strategy')
+        ).where(Offer.id == offer_id)
+    ).first()
+    if row is None:
+        return None, None
+    return row, compile_price_schedule(row.base_price, row.discount_strategy)
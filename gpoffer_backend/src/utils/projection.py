@@ -0,0 +1,73 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from src.models.user import db
+
+# Columns that are never readable through a projection
+EXCLUDED_FIELDS = {
+    'users': {'password_hash'},
+    'offers': {'payload'},
+    'payment_details': {'paypal_client_secret'},
+}
+
+
+def public_fields(model):
+    """Names of the columns of model that list endpoints may return"""
+    excluded = EXCLUDED_FIELDS.get(model.__tablename__, set())
+    return tuple(column.key for column in model.__table__.c if column.key not in excluded)
+
+
+def parse_fields(model, value):
+    """Validate a ?fields=a,b,c value, defaulting to every public field"""
+    allowed = public_fields(model)
+    if not value:
+        return allowed
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or allowed
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+@lru_cache(maxsize=256)
+def dto_class(model, selected, output):
+    """A __slots__ row class for the selected columns, emitting only output"""
+
+    def __init__(self, row):
+        for name, value in zip(selected, row):
+            setattr(self, name, value)
+
+    def to_dict(self):
+        return {name: _plain(getattr(self, name)) for name in output}
+
+    return type(f'{model.__name__}Row', (), {
+        '__slots__': selected,
+        '__init__': __init__,
+        'to_dict': to_dict,
+    })
+
+
+def projected_select(model, fields, required=()):
+    """Core SELECT of fields plus any required key columns, and its DTO class
+
+    required names columns the caller needs (e.g. for a cursor) that are
+    selected but only emitted if they were also requested.
+    """
+    selected = tuple(dict.fromkeys(fields + tuple(required)))
+    table = model.__table__
+    return db.select(*(table.c[name] for name in selected)), dto_class(model, selected, fields)
+
+
+def fetch_projected(model, fields, *criteria, order_by=(), limit=None):
+    """Run a projected query and map rows to DTOs without loading entities"""
+    statement, dto = projected_select(model, fields)
+    statement = statement.where(*criteria).order_by(*order_by)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return [dto(row) for row in db.session.execute(statement)]
@@ -0,0 +1,13 @@
+import json
+from flask import Response
+
+
+def json_list_response(key, items, status=200, **fields):
+    """Build a {'success': True, key: [...]} response from pre-rendered JSON items
+
+    items are JSON strings that are written into the body as-is, so listings
+    avoid decoding and re-encoding each row.
+    """
+    head = json.dumps(dict(success=True, **fields), separators=(',', ':'))
+    body = ''.join((head[:-1], ',"', key, '":[', ','.join(items), ']}'))
+    return Response(body, status=status, mimetype='application/json')
@@ -0,0 +1,20 @@
+import re
+
+# Letters, digits and underscores in any script; everything else separates terms
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text, prefix=True):
+    """Turn free text into a safe FTS5 MATCH expression
+
+    Each term is quoted so FTS5 operators in user input are treated as plain
+    words. Terms are ANDed together, and with prefix=True the last term also
+    matches as a prefix for typeahead. Returns None when there are no terms.
+    """
+    terms = TERM_PATTERN.findall(text or '')
+    if not terms:
+        return None
+    quoted = ['"%s"' % term for term in terms]
+    if prefix:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+# Vite emits content-hashed bundle names such as assets/index-B4bcSdJE.js
+HASHED_ASSET = re.compile(r'(^|/)assets/.+-[A-Za-z0-9_-]{8}\.\w+$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml', 'image/x-icon',
+                      'image/vnd.microsoft.icon')
+MIN_GZIP_SIZE = 1024
+
+
+class StaticAsset:
+    """One static file held in memory with its gzip variant and cache headers"""
+    __slots__ = ('body', 'gzip_body', 'mimetype', 'etag', 'last_modified', 'cache_control')
+
+    def __init__(self, body, gzip_body, mimetype, last_modified, cache_control):
+        self.body = body
+        self.gzip_body = gzip_body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+
+
+def _gzip_variant(path, body, mimetype):
+    # Prefer a .gz produced by the frontend build, otherwise compress once here
+    if os.path.exists(path + '.gz'):
+        with open(path + '.gz', 'rb') as f:
+            return f.read()
+    if len(body) < MIN_GZIP_SIZE or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return None
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    return compressed if len(compressed) < len(body) else None
+
+
+class AssetManifest:
+    """Static folder snapshot taken at startup; requests never touch the filesystem"""
+
+    def __init__(self, folder):
+        self.assets = {}
+        if folder and os.path.isdir(folder):
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    if name.endswith('.gz'):
+                        continue
+                    path = os.path.join(root, name)
+                    relative = os.path.relpath(path, folder).replace(os.sep, '/')
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                    self.assets[relative] = StaticAsset(
+                        body, _gzip_variant(path, body, mimetype), mimetype,
+                        datetime.fromtimestamp(os.path.getmtime(path), timezone.utc),
+                        IMMUTABLE_CACHE if HASHED_ASSET.search(relative) else REVALIDATE_CACHE,
+                    )
+        self.index = self.assets.get('index.html')
+
+    def lookup(self, path):
+        """Asset for path, falling back to index.html for client-side routes"""
+        return self.assets.get(path) or self.index
+
+    def respond(self, asset):
+        use_gzip = asset.gzip_body is not None and request.accept_encodings['gzip'] > 0
+        # The gzip body gets its own tag so caches never mix the two encodings
+        etag = asset.etag + '-gz' if use_gzip else asset.etag
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag)
+        response.last_modified = asset.last_modified
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.gzip_body is not None:
+            response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+ACCESS_TOKEN_TTL = 15 * 60
+REFRESH_TOKEN_TTL = 30 * 24 * 60 * 60
+
+# How long a verified access token is remembered before it is checked again
+PRINCIPAL_CACHE_TTL = 60
+PRINCIPAL_CACHE_SIZE = 10000
+
+# user_type of back-office (admin) accounts
+ADMIN_USER_TYPE = 'office'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class Principal:
+    """The authenticated caller, resolved from a token without a database hit"""
+    __slots__ = ('user_id', 'user_type', 'expires_at')
+
+    def __init__(self, user_id, user_type, expires_at):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.expires_at = expires_at
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'user_type': self.user_type,
+            'expires_at': int(self.expires_at)
+        }
+
+
+class TTLCache:
+    """Small thread-safe LRU whose entries also expire after a deadline"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires=None):
+        expires = min(expires or float('inf'), time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def _serializer(kind):
+    # A salt per token kind, so a refresh token is never accepted as an access token
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=f'gpoffer-{kind}')
+
+
+def issue_tokens(user):
+    """Return a fresh access/refresh token pair for user"""
+    claims = {'uid': user.id, 'ut': user.user_type}
+    return {
+        'access_token': _serializer('access').dumps(claims),
+        'refresh_token': _serializer('refresh').dumps({'uid': user.id}),
+        'token_type': 'Bearer',
+        'expires_in': ACCESS_TOKEN_TTL
+    }
+
+
+def _load(kind, token, max_age):
+    try:
+        claims, issued = _serializer(kind).loads(token, max_age=max_age, return_timestamp=True)
+    except SignatureExpired:
+        raise InvalidToken('Token has expired')
+    except BadSignature:
+        raise InvalidToken('Invalid token')
+    return claims, issued.timestamp() + max_age
+
+
+def verify_access_token(token):
+    """Resolve an access token to a Principal, using the cache when possible"""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    claims, expires_at = _load('access', token, ACCESS_TOKEN_TTL)
+    principal = Principal(claims['uid'], claims.get('ut'), expires_at)
+    principal_cache.set(token, principal, expires=expires_at)
+    return principal
+
+
+def verify_refresh_token(token):
+    """Return the user id a refresh token was issued to"""
+    claims, _ = _load('refresh', token, REFRESH_TOKEN_TTL)
+    return claims['uid']
+
+
+def load_principal():
+    """before_request hook: set g.principal from an Authorization: Bearer header
+
+    Requests without a valid token continue anonymously. An invalid or
+    expired token only records g.auth_error, so login and token refresh
+    still work with a stale header and protected endpoints decide to 401.
+    """
+    g.principal = None
+    g.auth_error = None
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        g.principal = verify_access_token(header[7:].strip())
+    except InvalidToken as e:
+        g.auth_error = str(e)
+    return None
+
+
+def authentication_required():
+    """401 response for an endpoint called without a valid access token"""
+    return jsonify({
+        'success': False,
+        'message': g.get('auth_error') or 'Authentication required'
+    }), 401
+
+
+def is_owner_or_admin(user_id):
+    """True if the caller is user_id or an admin"""
+    principal = g.principal
+    return principal is not None and (principal.user_id == user_id or principal.user_type == ADMIN_USER_TYPE)
@@ -0,0 +1,59 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.main import create_app
+from src.models import db
+from src.models.offer import Offer, OfferParticipant
+from src.models.schema import upgrade_schema
+from src.models.user import User
+
+BUYERS = 40
+ATTEMPTS = 2
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+    })
+    with app.app_context():
+        upgrade_schema()
+        supplier = User(username='supplier', email='supplier@example.com', password_hash='x', user_type='seller')
+        db.session.add(supplier)
+        db.session.flush()
+        db.session.add_all([User(username=f'buyer{i}', email=f'buyer{i}@example.com', password_hash='x')
+                            for i in range(BUYERS)])
+        db.session.add(Offer(title='Flash group buy', product_service='goods', target_region='EU', base_price=10.0,
+                             deadline=datetime.utcnow() + timedelta(days=1), supplier_id=supplier.id,
+                             status='Active'))
+        db.session.commit()
+    return app
+
+
+def test_concurrent_joins_keep_counter_and_rows_in_step(app):
+    local = threading.local()
+
+    def join(user_id):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return user_id, local.client.post('/api/offers/join/1', json={'user_id': user_id}).status_code
+
+    # Buyers are users 2..BUYERS + 1, each trying to join more than once
+    requests = [user_id for user_id in range(2, BUYERS + 2) for _ in range(ATTEMPTS)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(join, requests))
+
+    assert 500 not in {status for _, status in results}
+    joined = Counter(user_id for user_id, status in results if status == 201)
+    assert set(joined.values()) == {1}
+
+    with app.app_context():
+        committed = db.session.scalars(db.select(OfferParticipant.user_id).where(
+            OfferParticipant.offer_id == 1, OfferParticipant.status == 'Committed')).all()
+        assert db.session.get(Offer, 1).current_participants == len(committed) == len(joined)
+        assert len(set(committed)) == len(committed)
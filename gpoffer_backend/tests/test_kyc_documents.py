@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+import src.routes.kyc as kyc_routes
+from src.main import create_app
+from src.models.schema import upgrade_schema
+
+BOUNDARY = 'test-boundary'
+
+
+def multipart(fields, files):
+    parts = [f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in fields]
+    for filename, content in files:
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                     f'Content-Type: application/pdf\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        'KYC_DOCUMENT_DIR': str(tmp_path / 'documents'),
+        'KYC_MAX_DOCUMENT_BYTES': 1024,
+    })
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    for username in ('owner', 'other', 'admin'):
+        client.post('/api/register', json={'username': username, 'email': f'{username}@example.com',
+                                           'password': 'secret'})
+    app.test_cli_runner().invoke(args=['promote-admin', 'admin'])
+    return app
+
+
+def headers(client, username):
+    tokens = client.post('/api/login', json={'username': username, 'password': 'secret'}).get_json()
+    return {'Authorization': 'Bearer ' + tokens['access_token']}
+
+
+def upload(client, *files, username='owner'):
+    body = multipart([('user_id', '1'), ('document_type', 'passport')], files)
+    return client.post('/api/kyc/documents', data=body, headers=headers(client, username) if username else {},
+                       content_type=f'multipart/form-data; boundary={BOUNDARY}')
+
+
+def test_admin_accounts_cannot_be_self_registered(app):
+    client = app.test_client()
+    response = client.post('/api/register', json={'username': 'mallory', 'email': 'mallory@example.com',
+                                                  'password': 'secret', 'user_type': 'office'})
+    assert response.status_code == 400
+
+
+def test_uploads_are_limited_to_owner_and_admin(app):
+    client = app.test_client()
+    assert upload(client, ('passport.pdf', b'%PDF-1.7'), username=None).status_code == 401
+    assert upload(client, ('passport.pdf', b'%PDF-1.7'), username='other').status_code == 403
+    assert stored_files(app) == []
+    assert upload(client, ('passport.pdf', b'%PDF-1.7'), username='admin').status_code == 201
+
+
+def stored_files(app):
+    root = app.config['KYC_DOCUMENT_DIR']
+    return [name for path, _, names in os.walk(root) if 'incoming' not in path for name in names]
+
+
+def test_documents_are_limited_to_owner_and_admin(app):
+    client = app.test_client()
+    document = upload(client, ('passport.pdf', b'%PDF-1.7')).get_json()['documents'][0]
+    file_url = f"/api/kyc/documents/1/{document['id']}/file"
+
+    assert client.get('/api/kyc/documents/1').status_code == 401
+    assert client.get(file_url).status_code == 401
+    assert client.get(file_url, headers=headers(client, 'other')).status_code == 403
+    assert client.get(file_url, headers=headers(client, 'owner')).data == b'%PDF-1.7'
+    listing = client.get('/api/kyc/documents/1', headers=headers(client, 'admin')).get_json()
+    assert [d['id'] for d in listing['documents']] == [document['id']]
+
+
+def test_failed_upload_removes_the_files_it_stored(app):
+    client = app.test_client()
+    assert upload(client, ('first.pdf', b'a' * 100), ('huge.pdf', b'b' * 2048)).status_code == 413
+    assert stored_files(app) == []
+
+
+def test_database_failure_keeps_files_other_rows_use(app, monkeypatch):
+    client = app.test_client()
+    upload(client, ('kept.pdf', b'kept'))
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(kyc_routes, 'record_event', fail)
+    assert upload(client, ('new.pdf', b'new'), ('kept.pdf', b'kept')).status_code == 500
+    assert len(stored_files(app)) == 1
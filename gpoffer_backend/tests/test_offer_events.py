@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.main import create_app
+from src.models import db
+from src.models.offer import Offer
+from src.models.schema import upgrade_schema
+from src.utils.offer_events import offer_events
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(offer_events, 'interval', 0.1)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        upgrade_schema()
+        db.session.add(Offer(title='Widget', product_service='p', target_region='EU', base_price=10,
+                             deadline=datetime.utcnow() + timedelta(days=1), supplier_id=1, status='Active'))
+        db.session.commit()
+    return app
+
+
+def read_until(chunks, text, limit=5):
+    """Read SSE chunks until one contains text; the heartbeat bounds each wait"""
+    for _ in range(limit):
+        chunk = next(chunks).decode()
+        if text in chunk:
+            return chunk
+    return None
+
+
+def test_stream_sees_changes_committed_by_another_process(app):
+    response = app.test_client().get('/api/offers/events?ids=1', buffered=False)
+    chunks = iter(response.response)
+    assert read_until(chunks, '"Active"')
+
+    # The run-jobs sweeper settles offers in its own process, so nothing is published here
+    with app.app_context():
+        db.session.execute(db.update(Offer).where(Offer.id == 1).values(status='Expired'))
+        db.session.commit()
+
+    received = read_until(chunks, 'event: status')
+    response.close()
+    assert received and '"Expired"' in received
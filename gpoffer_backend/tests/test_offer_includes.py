@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models import db
+from src.models.offer import Offer, OfferParticipant
+from src.models.schema import upgrade_schema
+from src.models.user import User
+
+ENDPOINTS = (
+    '/api/offers?include=supplier,participant_count&limit=100',
+    '/api/offers?include=supplier,participant_count&fields=id,title,base_price&limit=100',
+    '/api/offers/search?q=widget&include=supplier,participant_count&limit=100',
+)
+BUYERS = 5
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        upgrade_schema()
+        db.session.add_all([User(username=f'buyer{i}', email=f'buyer{i}@example.com', password_hash='x')
+                            for i in range(BUYERS)])
+        db.session.commit()
+    return app
+
+
+def add_offers(app, count):
+    """Add count offers, each from its own supplier, offer n having (n - 1) % BUYERS participants"""
+    with app.app_context():
+        start = db.session.scalar(db.select(db.func.count(Offer.id)))
+        sellers = [User(username=f'seller{start + i}', email=f'seller{start + i}@example.com', password_hash='x',
+                        user_type='seller', store_name=f'Store {start + i}') for i in range(count)]
+        db.session.add_all(sellers)
+        db.session.flush()
+        offers = [Offer(title=f'Widget {start + i}', product_service='widget', target_region='EU', base_price=10.0,
+                        deadline=datetime.utcnow() + timedelta(days=1), supplier_id=seller.id, status='Active')
+                  for i, seller in enumerate(sellers)]
+        db.session.add_all(offers)
+        db.session.flush()
+        db.session.add_all([OfferParticipant(offer_id=offer.id, user_id=buyer_id, commitment_amount=10.0,
+                                             status='Committed')
+                            for offer in offers for buyer_id in range(1, (offer.id - 1) % BUYERS + 1)])
+        db.session.commit()
+
+
+def count_queries(app, url):
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = app.test_client().get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200
+    return len(statements), response.get_json()['offers']
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_include_query_count_does_not_grow_with_offers(app, url):
+    add_offers(app, 20)
+    queries, offers = count_queries(app, url)
+    assert len(offers) == 20
+
+    add_offers(app, 20)
+    queries_doubled, offers = count_queries(app, url)
+    assert len(offers) == 40
+    assert queries_doubled == queries
+    for offer in offers:
+        assert offer['participant_count'] == (offer['id'] - 1) % BUYERS
+        assert offer['supplier']['store_name']
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.jobs.outbox_dispatcher as dispatcher
+import src.jobs.outbox_handlers as handlers
+from src.jobs.outbox_dispatcher import OutboxDispatcher
+from src.main import create_app
+from src.models import db
+from src.models.offer import Offer
+from src.models.outbox import OutboxEvent, record_event
+from src.models.schema import upgrade_schema
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    sent = []
+    monkeypatch.setattr(handlers, 'send_email', lambda to, subject, body: sent.append((to, subject)))
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    app.sent = sent
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    for username, user_type in (('supplier', 'seller'), ('buyer', 'buyer'), ('admin', 'buyer')):
+        client.post('/api/register', json={'username': username, 'email': f'{username}@example.com',
+                                           'password': 'secret', 'user_type': user_type})
+    app.test_cli_runner().invoke(args=['promote-admin', 'admin'])
+    with app.app_context():
+        db.session.add(Offer(title='Widget', product_service='p', target_region='EU', base_price=10,
+                             deadline=datetime.utcnow() + timedelta(days=1), supplier_id=1, status='Active'))
+        db.session.commit()
+    return app
+
+
+def dispatch(app):
+    dispatcher_thread = OutboxDispatcher(app, workers=1)
+    try:
+        return dispatcher_thread.dispatch_once()
+    finally:
+        dispatcher_thread.pool.shutdown()
+
+
+def statuses(app):
+    with app.app_context():
+        return dict(db.session.execute(db.select(OutboxEvent.event_type, OutboxEvent.status)).all())
+
+
+def test_events_without_a_handler_stay_pending(app):
+    with app.app_context():
+        record_event('kyc.submitted', 'user', 2)
+        db.session.commit()
+    assert dispatch(app) == 0
+    assert statuses(app) == {'kyc.submitted': 'pending'}
+
+    app.sent.clear()
+    dispatcher.register_handler('kyc.submitted', lambda event: app.sent.append(event['event_type']))
+    try:
+        assert dispatch(app) == 1
+    finally:
+        dispatcher.OUTBOX_HANDLERS.pop('kyc.submitted')
+    assert app.sent == ['kyc.submitted']
+    assert statuses(app) == {'kyc.submitted': 'delivered'}
+
+
+def test_handlers_notify_supplier_buyer_and_admins(app):
+    client = app.test_client()
+    client.post('/api/offers/join/1', json={'user_id': 2})
+    client.post('/api/orders', json={'offer_id': 1, 'buyer_id': 2, 'quantity': 1, 'payment_method': 'paypal',
+                                     'shipping_address': 'Street 1', 'buyer_name': 'Buyer',
+                                     'buyer_phone': '123', 'buyer_email': 'orders@example.com'})
+    client.post('/api/complaints', json={'complainant_id': 2, 'against_user_id': 1, 'complaint_type': 'delivery',
+                                         'subject': 'Late', 'description': 'Still waiting'})
+
+    assert dispatch(app) == 3
+    recipients = sorted(str(to) for to, _ in app.sent)
+    assert recipients == ["['admin@example.com']", 'orders@example.com', 'supplier@example.com']
+    assert set(statuses(app).values()) == {'delivered'}
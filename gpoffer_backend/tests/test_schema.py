@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.main import create_app
+from src.models import db
+from src.models.schema import SCHEMA_VERSION, current_schema_version, upgrade_schema
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        yield app
+
+
+def test_upgrade_adds_columns_and_unique_constraints_to_existing_tables(app):
+    # wallet_transactions as created before idempotency keys existed
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE wallet_transactions (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+            'transaction_type VARCHAR(20) NOT NULL, amount INTEGER NOT NULL, status VARCHAR(20), '
+            'created_at DATETIME)'
+        )
+    upgrade_schema()
+
+    insert = db.text("INSERT INTO wallet_transactions (user_id, transaction_type, amount, idempotency_key) "
+                     "VALUES (1, 'purchase', 10, 'retry-1')")
+    db.session.execute(insert)
+    with pytest.raises(IntegrityError):
+        db.session.execute(insert)
+    db.session.rollback()
+
+
+def test_upgrade_is_applied_once(app):
+    assert [version for version, _ in upgrade_schema()] == list(range(1, SCHEMA_VERSION + 1))
+    assert upgrade_schema() == []
+    assert current_schema_version() == SCHEMA_VERSION
@@ -0,0 +1,41 @@
+import pytest
+
+from src.main import create_app
+from src.models.schema import upgrade_schema
+
+STALE = {'Authorization': 'Bearer not-a-token'}
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'buyer', 'email': 'buyer@example.com', 'password': 'secret'})
+    return client
+
+
+def test_login_and_refresh_ignore_a_stale_bearer_header(client):
+    response = client.post('/api/login', json={'username': 'buyer', 'password': 'secret'}, headers=STALE)
+    assert response.status_code == 200
+    refresh_token = response.get_json()['refresh_token']
+    response = client.post('/api/token/refresh', json={'refresh_token': refresh_token}, headers=STALE)
+    assert response.status_code == 200
+
+
+def test_public_endpoints_treat_an_invalid_token_as_anonymous(client):
+    assert client.get('/api/offers', headers=STALE).status_code == 200
+
+
+def test_protected_endpoint_reports_the_token_error(client):
+    response = client.get('/api/me', headers=STALE)
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Invalid token'
+    assert client.get('/api/me').get_json()['message'] == 'Authentication required'
+
+
+def test_protected_endpoint_accepts_a_valid_token(client):
+    tokens = client.post('/api/login', json={'username': 'buyer', 'password': 'secret'}).get_json()
+    response = client.get('/api/me', headers={'Authorization': 'Bearer ' + tokens['access_token']})
+    assert response.get_json()['principal']['user_type'] == 'buyer'
@@ -0,0 +1,33 @@
+import pytest
+
+from src.main import create_app
+from src.models import db
+from src.models.schema import upgrade_schema
+from src.models.user import User
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        upgrade_schema()
+        db.session.add(User(username='buyer', email='buyer@example.com', password_hash='x'))
+        db.session.commit()
+    return app.test_client()
+
+
+def purchase(client, amount, key):
+    return client.post('/api/wallet/purchase-points', json={'user_id': 1, 'amount': amount,
+                                                            'payment_method': 'paypal'},
+                       headers={'Idempotency-Key': key})
+
+
+def test_retry_returns_the_balance_the_original_request_left(client):
+    first = purchase(client, 10, 'purchase-1')
+    assert first.status_code == 201
+    assert purchase(client, 20, 'purchase-2').get_json()['new_balance'] == 30
+
+    retry = purchase(client, 10, 'purchase-1')
+    assert retry.status_code == 200
+    assert retry.get_json()['replayed'] is True
+    assert retry.get_json()['new_balance'] == first.get_json()['new_balance'] == 10
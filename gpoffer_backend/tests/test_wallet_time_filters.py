@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from src.main import create_app
+from src.models import db
+from src.models.schema import upgrade_schema
+from src.models.user import User
+from src.utils.ledger import post_transaction
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        upgrade_schema()
+        user = User(username='buyer', email='buyer@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        # Three purchases at 10:00, 12:00 and 14:00 UTC, leaving balances 10, 30, 60
+        for points, hour in ((10, 10), (20, 12), (30, 14)):
+            transaction, _, _ = post_transaction(user.id, points, transaction_type='purchase')
+            transaction.created_at = datetime(2025, 1, 1, hour)
+            db.session.commit()
+    return app.test_client()
+
+
+def test_balance_as_of_honours_offset(client):
+    # 13:00+02:00 is 11:00 UTC, after the first purchase only
+    response = client.get('/api/wallet/1/balance', query_string={'as_of': '2025-01-01T13:00:00+02:00'})
+    assert response.get_json()['balance'] == 10
+
+
+def test_balance_as_of_accepts_trailing_z(client):
+    response = client.get('/api/wallet/1/balance', query_string={'as_of': '2025-01-01T13:00:00Z'})
+    assert response.get_json()['balance'] == 30
+
+
+def test_transaction_range_honours_offsets(client):
+    # 13:00+02:00 is 11:00 UTC and 08:00-05:00 is 13:00 UTC
+    response = client.get('/api/wallet/1/transactions', query_string={
+        'created_after': '2025-01-01T13:00:00+02:00',
+        'created_before': '2025-01-01T08:00:00-05:00',
+    })
+    transactions = response.get_json()['transactions']
+    assert [t['amount'] for t in transactions] == [20]
+
+
+def test_invalid_datetime_is_rejected(client):
+    response = client.get('/api/wallet/1/transactions', query_string={'created_after': 'yesterday'})
+    assert response.status_code == 400